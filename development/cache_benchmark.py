@@ -0,0 +1,67 @@
+"""
+Micro-benchmark of the overhead of the caching layer (:mod:`hmf._cache`).
+
+Times the pure bookkeeping of cached quantities and parameters, with trivial
+calculations, so that the per-access overhead is what is measured:
+
+* a cache hit on a quantity,
+* a parameter update followed by re-calculation of a chain of quantities,
+* a cache hit on ``MassFunction.dndm``.
+
+Run with ``python development/cache_benchmark.py``.
+"""
+from __future__ import print_function
+import timeit
+
+from hmf import MassFunction
+from hmf._cache import parameter, cached_quantity
+from hmf._framework import Framework
+
+
+class Chain(Framework):
+    def __init__(self):
+        super(Chain, self).__init__()
+        self.a = 1.0
+        self.b = 2.0
+        self.c = 3.0
+
+    @parameter("param")
+    def a(self, val):
+        return val
+
+    @parameter("param")
+    def b(self, val):
+        return val
+
+    @parameter("switch")
+    def c(self, val):
+        return val
+
+    @cached_quantity
+    def q1(self):
+        return self.a + self.b
+
+    @cached_quantity
+    def q2(self):
+        return self.q1 * self.c
+
+    @cached_quantity
+    def q3(self):
+        return self.q2 + self.q1 + self.a
+
+
+def bench(stmt, number):
+    t = min(timeit.repeat(stmt, "from __main__ import chain, mf", repeat=5, number=number))
+    return 1e6 * t / number
+
+
+if __name__ == "__main__":
+    chain = Chain()
+    chain.q3
+
+    mf = MassFunction(transfer_model="EH")
+    mf.dndm
+
+    print("Quantity cache hit:          %.3f us" % bench("chain.q3", 100000))
+    print("Update + recalculate chain:  %.3f us" % bench("chain.a += 1; chain.q3", 20000))
+    print("MassFunction.dndm cache hit: %.3f us" % bench("mf.dndm", 100000))
@@ -5,17 +5,489 @@ http://forrst.com/posts/Yet_another_caching_property_decorator_for_Pytho-PBy
 They are both designed to cache class properties, but have the added
 functionality of being automatically updated when a parent property is
 updated.
+
+All bookkeeping for an instance is kept in a single :class:`CacheState` object.
+Each parameter and quantity name is assigned a bit (see :func:`bit_of`), so that
+dependency sets and "needs re-calculation" flags are plain integer bitsets.
 """
 from functools import update_wrapper
-from copy import copy
+from timeit import default_timer
+import hashlib
+import numbers
+import os
+import threading
+import warnings
+import weakref
+import numpy as np
+from astropy.cosmology import Cosmology
+from ._utils import atomic_write
+
+# Global registry of bit positions for parameter and quantity names.
+_ids = {}
+_names = []
+
+
+def bit_of(name):
+    """
+    The bit (a power of two) assigned to the parameter or quantity `name`.
+    """
+    try:
+        return 1 << _ids[name]
+    except KeyError:
+        _ids[name] = len(_names)
+        _names.append(name)
+        return 1 << _ids[name]
+
+
+def names_of(mask):
+    """
+    The names corresponding to the set bits of `mask`.
+    """
+    out = []
+    while mask:
+        low = mask & -mask
+        out.append(_names[low.bit_length() - 1])
+        mask ^= low
+    return out
+
+
+def mask_of(names):
+    """
+    The bitset of the parameter or quantity `names`.
+    """
+    mask = 0
+    for name in names:
+        mask |= bit_of(name)
+    return mask
 
 
-def hidden_loc(obj, name):
+class CacheState(object):
     """
-    Generate the location of a hidden attribute.
-    Importantly deals with attributes beginning with an underscore.
+    The cached values and dependency index of an instance.
+
+    Attributes
+    ----------
+    params : dict
+        Current values of the parameters.
+    values : dict
+        Cached values of the quantities.
+    deps : dict
+        For each indexed quantity, the bitset of parameters on which it depends.
+    dependents : dict
+        For each parameter, the bitset of quantities which depend on it.
+    stale : int
+        Bitset of the quantities which need to be re-calculated.
+    hashes : dict
+        Memoised hashes of the parameter values (see :meth:`digest`).
+    stack : list
+        Bitsets of parameters accessed by each quantity currently being calculated.
+    lock : :class:`threading.RLock` or None
+        If not None, all access to the instance's parameters and quantities is
+        serialised through this lock (see :meth:`set_locking`).
+    """
+    __slots__ = ("params", "values", "deps", "dependents", "stale", "hashes", "stack", "lock", "__weakref__")
+
+    def __init__(self):
+        self.params = {}
+        self.values = {}
+        self.deps = {}
+        self.dependents = {}
+        self.stale = 0
+        self.hashes = {}
+        self.stack = []
+        self.lock = None
+
+    def __getstate__(self):
+        # Bits are assigned in a different order in each process, so the index is stored by
+        # name. Locks can't be pickled, so just record whether there was one.
+        return {"params": self.params,
+                "values": self.values,
+                "deps": dict((q, names_of(mask)) for q, mask in self.deps.items()),
+                "stale": names_of(self.stale),
+                "hashes": self.hashes,
+                "lock": self.lock is not None}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.params = state["params"]
+        self.values = state["values"]
+        self.hashes = state["hashes"]
+        for q, names in state["deps"].items():
+            self.index(q, bit_of(q), mask_of(names))
+        self.stale = mask_of(state["stale"])
+        self.set_locking(state["lock"])
+
+    def copy(self):
+        """
+        A new state sharing the cached values of this one.
+
+        Array values are shared as read-only views. Dict parameters are copied,
+        as they are updated in-place.
+        """
+        new = CacheState()
+        new.params = dict((k, dict(v) if isinstance(v, dict) else v) for k, v in self.params.items())
+        for k, v in self.values.items():
+            if isinstance(v, np.ndarray):
+                v = v.view()
+                v.flags.writeable = False
+            new.values[k] = v
+        new.deps = dict(self.deps)
+        new.dependents = dict(self.dependents)
+        new.stale = self.stale
+        new.hashes = dict(self.hashes)
+        new.set_locking(self.lock is not None)
+        return new
+
+    def set_locking(self, enable):
+        """
+        Enable or disable serialisation of access through a re-entrant lock.
+        """
+        if enable and self.lock is None:
+            self.lock = threading.RLock()
+            _locked_states.add(self)
+        elif not enable:
+            self.lock = None
+            _locked_states.discard(self)
+
+    def digest(self, name):
+        """
+        A hash of the current value of parameter `name`, calculated once per value.
+
+        Raises TypeError if the value is not of a type whose content can be hashed
+        (see :func:`_hash_value`).
+        """
+        try:
+            return self.hashes[name]
+        except KeyError:
+            h = hashlib.sha1()
+            _hash_value(self.params[name], h)
+            self.hashes[name] = h.digest()
+            return self.hashes[name]
+
+    def fingerprint(self, names):
+        """
+        A hash of the names and current values of the parameters `names`.
+        """
+        h = hashlib.sha1()
+        for name in sorted(names):
+            h.update(name.encode())
+            h.update(self.digest(name))
+        return h.hexdigest()
+
+    def index(self, name, bit, mask):
+        """
+        Record that quantity `name` depends on the parameters in `mask`.
+        """
+        old = self.deps.get(name, 0)
+        for par in names_of(old & ~mask):
+            self.dependents[par] &= ~bit
+        for par in names_of(mask & ~old):
+            self.dependents[par] = self.dependents.get(par, 0) | bit
+        self.deps[name] = mask
+
+    def forget(self, name):
+        """
+        Remove the cached value and dependency index of quantity `name`.
+        """
+        self.values.pop(name, None)
+        if name in self.deps:
+            self.index(name, bit_of(name), 0)
+            del self.deps[name]
+        self.stale &= ~bit_of(name)
+
+
+# States with locks, which must be reset in the child after a fork, in case
+# another thread held the lock (or was part-way through a calculation) at the time.
+_locked_states = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for state in list(_locked_states):
+        state.lock = threading.RLock()
+        state.stack = []
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_state(obj):
+    """
+    The :class:`CacheState` of `obj`, created if it does not yet exist.
+    """
+    try:
+        return obj.__dict__["_cache_state"]
+    except KeyError:
+        obj._cache_state = CacheState()
+        return obj._cache_state
+
+
+class Profile(object):
     """
-    return ("_" + obj.__class__.__name__ + "__" + name).replace("___", "__")
+    Accumulates timing and cache statistics for the cached quantities of an instance.
+
+    An instance is created by :meth:`hmf._framework.Framework.enable_profiling`. When
+    profiling is not enabled, no statistics are gathered, at no cost.
+    """
+    def __init__(self):
+        self.stats = {}
+        self._stack = []
+
+    def _get(self, name):
+        if name not in self.stats:
+            self.stats[name] = {"hits": 0, "misses": 0, "time": 0.0, "triggers": {}}
+        return self.stats[name]
+
+    def hit(self, name):
+        self._get(name)["hits"] += 1
+
+    def call(self, obj, f):
+        """
+        Evaluate ``f(obj)``, recording its time excluding any nested cached quantities.
+        """
+        self._stack.append(0.0)
+        start = default_timer()
+        try:
+            return f(obj)
+        finally:
+            elapsed = default_timer() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+
+            stats = self._get(f.__name__)
+            stats["misses"] += 1
+            stats["time"] += elapsed - children
+
+    def trigger(self, name, par):
+        triggers = self._get(name)["triggers"]
+        triggers[par] = triggers.get(par, 0) + 1
+
+
+# The parameters of an FLRW cosmology, for versions of astropy that don't list them.
+_FLRW_PARAMETERS = ("H0", "Om0", "Ode0", "Tcmb0", "Neff", "m_nu", "Ob0")
+
+
+def _cosmology_parameters(cosmo):
+    """
+    The names of the parameters of the astropy cosmology `cosmo`.
+    """
+    if hasattr(cosmo, "__parameters__"):  # astropy 5
+        return cosmo.__parameters__
+    params = getattr(cosmo, "parameters", None)
+    if params is not None:  # astropy >= 6
+        return tuple(params)
+    return tuple(name for name in _FLRW_PARAMETERS if hasattr(cosmo, name))
+
+
+def _hash_value(val, h):
+    """
+    Update the hash object `h` with the content of a parameter value `val`.
+
+    Only values whose content is known are hashed: builtin scalars and strings, numpy
+    scalars and arrays (with the unit of a Quantity), classes, astropy cosmologies (by
+    their parameters) and dicts, lists and tuples of these. Numbers are hashed by their
+    exact value, never a rounded representation.
+
+    Raises TypeError for any other value.
+    """
+    if val is None or isinstance(val, (bool, numbers.Number, str)) and not isinstance(val, np.generic):
+        h.update(("%s:%r" % (type(val).__name__, val)).encode())
+    elif isinstance(val, (np.ndarray, np.generic)):
+        arr = np.asarray(val)
+        if arr.dtype.hasobject:
+            raise TypeError("cannot hash object arrays")
+        h.update(repr((arr.dtype.str, arr.shape, str(getattr(val, "unit", "")))).encode())
+        h.update(np.ascontiguousarray(arr).tobytes())
+    elif isinstance(val, dict):
+        h.update(b"{")
+        for k in sorted(val, key=repr):
+            h.update(repr(k).encode())
+            _hash_value(val[k], h)
+        h.update(b"}")
+    elif isinstance(val, (list, tuple)):
+        h.update(b"[")
+        for v in val:
+            _hash_value(v, h)
+        h.update(b"]")
+    elif isinstance(val, type):
+        h.update((val.__module__ + "." + val.__qualname__).encode())
+    elif isinstance(val, Cosmology):
+        cls = type(val)
+        h.update((cls.__module__ + "." + cls.__qualname__ + "(").encode())
+        for name in _cosmology_parameters(val):
+            h.update(name.encode())
+            _hash_value(getattr(val, name), h)
+        h.update(b")")
+    else:
+        raise TypeError("cannot hash a value of type %s" % type(val).__name__)
+
+
+class DiskCache(object):
+    """
+    A persistent, content-addressed store of the values of selected cached quantities.
+
+    Values are stored in `directory`, keyed by the class, the quantity and the values of the
+    parameters on which the quantity depends (as found by the dependency index when it was
+    first stored), so they may be shared between instances, processes and runs.
+    An instance is created by :meth:`hmf._framework.Framework.enable_disk_cache`.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the store.
+
+    quantities : list of str
+        Names of the quantities to store.
+
+    max_size : int, optional
+        Maximum total size of the store in bytes. When it is exceeded, the least-recently
+        used values are removed.
+
+    Notes
+    -----
+    Only array and numerical values are stored, and only when all the parameters on which
+    they depend can be hashed by content (see :func:`_hash_value`); a warning is emitted
+    when a value can't be stored for this reason. Values are written atomically, so that
+    concurrent processes never read a partial file.
+
+    The size of the store is found by scanning it on the first write, and afterwards
+    tracked from the values written by this instance (the store is re-scanned whenever
+    the limit appears to be exceeded). Values written by other processes are therefore
+    only accounted for at the next scan.
+    """
+    def __init__(self, directory, quantities, max_size=2 ** 30):
+        self.directory = directory
+        self.quantities = frozenset(quantities)
+        self.max_size = max_size
+        self._names = {}
+        self._size = None
+
+    def _qdir(self, obj, f):
+        # Keyed by the class of `obj`, since a subclass may override any quantity upstream of `f`,
+        # and by the function itself, since an overriding quantity may call the one it overrides.
+        cls = type(obj)
+        return os.path.join(self.directory, "%s.%s" % (cls.__module__, cls.__qualname__),
+                            "%s.%s" % (f.__module__, getattr(f, "__qualname__", f.__name__)))
+
+    def _key(self, names, state):
+        from . import __version__
+        return hashlib.sha1((__version__ + state.fingerprint(names)).encode()).hexdigest()
+
+    def _depset(self, qdir, sub):
+        # The names of the parameters of a stored dependency set, which never change.
+        path = os.path.join(qdir, sub)
+        if path not in self._names:
+            try:
+                with open(os.path.join(path, "names")) as f:
+                    self._names[path] = f.read().split()
+            except (IOError, OSError):
+                return None
+        return self._names[path]
+
+    def call(self, obj, f):
+        """
+        Return the stored value of quantity ``f`` of `obj`, or evaluate and store it.
+        """
+        state = obj._cache_state
+        qdir = self._qdir(obj, f)
+
+        # A quantity may have a different set of dependencies for each configuration of the
+        # switches, so try each that has been stored, the most specific first.
+        try:
+            subs = os.listdir(qdir)
+        except OSError:
+            subs = []
+
+        depsets = [(sub, self._depset(qdir, sub)) for sub in subs]
+        depsets = sorted([d for d in depsets if d[1] is not None], key=lambda d: -len(d[1]))
+
+        for sub, names in depsets:
+            if any(n not in state.params for n in names):
+                continue
+
+            try:
+                fname = os.path.join(qdir, sub, self._key(names, state) + ".npy")
+                value = np.load(fname)
+                os.utime(fname, None)
+            except (TypeError, IOError, OSError, ValueError):
+                continue
+
+            state.stack[-1] |= mask_of(names)
+            return value.item() if value.ndim == 0 else value
+
+        value = _compute(obj, f)
+        self._store(qdir, sorted(names_of(state.stack[-1])), state, value)
+        return value
+
+    def _store(self, qdir, names, state, value):
+        if not isinstance(value, (np.ndarray, numbers.Number)) or np.asarray(value).dtype.hasobject:
+            return
+
+        try:
+            key = self._key(names, state)
+        except TypeError as e:
+            warnings.warn("not storing %s in the disk cache: %s" % (os.path.basename(qdir), e))
+            return
+
+        path = os.path.join(qdir, hashlib.sha1(" ".join(names).encode()).hexdigest()[:16])
+        if not os.path.exists(os.path.join(path, "names")):
+            if not os.path.exists(path):
+                try:
+                    os.makedirs(path)
+                except OSError:  # Created by another process in the meantime
+                    pass
+            atomic_write(os.path.join(path, "names"), lambda fl: fl.write(" ".join(names).encode()))
+
+        fname = os.path.join(path, key + ".npy")
+        atomic_write(fname, lambda fl: np.save(fl, value))
+
+        size = os.path.getsize(fname)
+        if self._size is None or self._size + size > self.max_size:
+            self.evict()
+        else:
+            self._size += size
+
+    def evict(self):
+        """
+        Remove the least-recently used values until the store is within `max_size`.
+
+        This scans the whole store.
+        """
+        files = []
+        for root, dirs, fnames in os.walk(self.directory):
+            for fname in fnames:
+                if fname.endswith(".npy"):
+                    try:
+                        st = os.stat(os.path.join(root, fname))
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, os.path.join(root, fname)))
+
+        total = sum(f[1] for f in files)
+        for mtime, size, fname in sorted(files):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(fname)
+            except OSError:
+                pass
+            total -= size
+        self._size = total
+
+
+def _evaluate(self, f):
+    # Evaluate a cached quantity, through the disk cache and profiler if they are enabled.
+    disk = getattr(self, "_disk_cache", None)
+    if disk is not None and f.__name__ in disk.quantities:
+        return disk.call(self, f)
+    return _compute(self, f)
+
+
+def _compute(self, f):
+    profile = getattr(self, "_profile", None)
+    if profile is None:
+        return f(self)
+    return profile.call(self, f)
 
 
 def cached_quantity(f):
@@ -49,79 +521,48 @@ def cached_quantity(f):
     """
 
     name = f.__name__
+    bit = bit_of(name)
 
     def _get_property(self):
-        # Location of the property to be accessed
-        prop = hidden_loc(self, name)
-
-        # Locations of indexes [they are set up in the parameter decorator]
-        recalc = hidden_loc(self, "recalc")
-        recalc_prpa = hidden_loc(self, "recalc_prop_par")
-        recalc_prpa_static = hidden_loc(self, "recalc_prop_par_static")
-        recalc_papr = hidden_loc(self, "recalc_par_prop")
-
-        # First, if this property has already been indexed,
-        # we must ensure all dependent parameters are copied into active indexes,
-        # otherwise they will be lost to their parents.
-        if name in getattr(self, recalc):
-            for pr, v in getattr(self, recalc_prpa).items():
-                v.update(getattr(self, recalc_prpa_static)[name])
-
-        # If this property already in recalc and doesn't need updating, just return.
-        if not getattr(self, recalc).get(name, True):
-            return getattr(self, prop)
-
-        # Otherwise, if its in recalc, and needs updating, just update it
-        elif name in getattr(self, recalc):
-            value = f(self)
-            setattr(self, prop, value)
-
-            # Ensure it doesn't need to be recalculated again
-            getattr(self, recalc)[name] = False
-
-            return value
-
-        # Otherwise, we need to create its index for caching.
-        supered = name in getattr(self, recalc_prpa) # if name is already there, can only be because the method has been supered.
-        if not supered:
-            getattr(self, recalc_prpa)[name] = set()  # Empty set to which parameter names will be added
-
-        # Go ahead and calculate the value -- each parameter accessed will add itself to the index.
-        value = f(self)
-        setattr(self, prop, value)
-
-        # Invert the index
-        for par in getattr(self, recalc_prpa)[name]:
-            getattr(self, recalc_papr)[par].add(name)
-
-
-        # Copy index to static dict, and remove the index (so that parameters don't keep on trying to add themselves)
-        if not supered: # If super, don't want to remove the name just yet.
-            getattr(self, recalc_prpa_static)[name] = copy(getattr(self, recalc_prpa)[name])
-            del getattr(self, recalc_prpa)[name]
-
-        # Add entry to master recalc list
-        getattr(self, recalc)[name] = False
-
+        state = self._cache_state
+        if state.lock is None:
+            return _get(self, state)
+        with state.lock:
+            return _get(self, state)
+
+    def _get(self, state):
+        stack = state.stack
+
+        # If this quantity is indexed and doesn't need updating, just return it,
+        # adding its dependencies to any quantity currently being calculated.
+        if name in state.deps and not state.stale & bit:
+            if stack:
+                stack[-1] |= state.deps[name]
+            if getattr(self, "_profile", None) is not None:
+                self._profile.hit(name)
+            return state.values[name]
+
+        # Otherwise calculate it -- each parameter accessed will add itself to the
+        # top of the stack, and nested quantities will add their dependencies on return.
+        stack.append(0)
+        try:
+            value = _evaluate(self, f)
+        finally:
+            mask = stack.pop()
+            if stack:
+                stack[-1] |= mask
+
+        state.index(name, bit, mask)
+        state.values[name] = value
+        state.stale &= ~bit
         return value
 
     update_wrapper(_get_property, f)
 
     def _del_property(self):
-        # Locations of indexes
-        recalc = hidden_loc(self, "recalc")
-        recalc_prpa = hidden_loc(self, "recalc_prop_par_static")
-        recalc_papr = hidden_loc(self, "recalc_par_prop")
-
-        # Delete the property AND its recalc dicts
+        # Delete the cached value AND its index
         try:
-            prop = hidden_loc(self, name)
-            delattr(self, prop)
-            del getattr(self, recalc)[name]
-            del getattr(self, recalc_prpa)[name]
-            # for e in getattr(self, recalc_papr):
-            #     if name in getattr(self, recalc_papr)[e]:
-            #         getattr(self, recalc_papr)[e].remove(name)
+            self._cache_state.forget(name)
         except AttributeError:
             pass
 
@@ -129,6 +570,11 @@ def cached_quantity(f):
 
 
 def obj_eq(ob1, ob2):
+    # Arrays of different shape (eg. a scalar replaced by a vector) always differ.
+    if hasattr(ob1, "shape") or hasattr(ob2, "shape"):
+        if np.shape(ob1) != np.shape(ob2):
+            return False
+
     try:
         if ob1 == ob2:
             return True
@@ -141,6 +587,17 @@ def obj_eq(ob1, ob2):
             return False
 
 
+def _array_eq(arr, old):
+    # Cheap checks first, so that arrays are only compared element-wise when they may be equal.
+    if arr is old:
+        return True
+    if not isinstance(old, np.ndarray) or arr.shape != old.shape or arr.dtype != old.dtype:
+        return False
+    if getattr(arr, "unit", None) != getattr(old, "unit", None):
+        return False
+    return np.array_equal(arr, old)
+
+
 def parameter(kind):
     """
     A decorator which indicates a parameter of a calculation (i.e. something that must be input by user).
@@ -180,69 +637,76 @@ def parameter(kind):
 
     def param(f):
         name = f.__name__
+        bit = bit_of(name)
 
         def _set_property(self, val):
-            prop = hidden_loc(self, name)
-
+            state = get_state(self)
+            if state.lock is None:
+                _set(self, state, val)
+            else:
+                with state.lock:
+                    _set(self, state, val)
+
+        def _set(self, state, val):
             # The following does any complex setting that is written into the code
             val = f(self, val)
 
-            # Locations of indexes
-            recalc = hidden_loc(self, "recalc")
-            recalc_prpa = hidden_loc(self, "recalc_prop_par")
-            recalc_papr = hidden_loc(self, "recalc_par_prop")
-            recalc_prpa_static = hidden_loc(self, "recalc_prop_par_static")
-
-            try:
-                # If the property has already been set, we can grab its old value
-                old_val = _get_property(self)
-                doset = False
-            except AttributeError:
-                # Otherwise, it has no old value.
-                old_val = None
-                doset = True
-
-                # It's not been set before, so add it to our list of parameters
-                try:
-                    # Only works if something has been set before
-                    getattr(self, recalc_papr)[name] = set()
+            doset = name not in state.params
 
-                except AttributeError:
-                    # Given that *at least one* parameter must be set before properties are calculated,
-                    # we can define the original empty indexes here.
-                    setattr(self, recalc, {})
-                    setattr(self, recalc_prpa, {})
-                    setattr(self, recalc_prpa_static, {})
-                    setattr(self, recalc_papr, {name: set()})
+            if isinstance(val, np.ndarray) and not doset:
+                same = _array_eq(val, state.params[name])
+            else:
+                same = not doset and obj_eq(val, state.params[name])
 
             # If either the new value is different from the old, or we never set it before
-            if not obj_eq(val, old_val) or doset:
+            if not same:
                 # Then if its a dict, we update it
-                if isinstance(val, dict) and hasattr(self, prop) and val:
-                    getattr(self, prop).update(val)
+                if isinstance(val, dict) and not doset and val:
+                    state.params[name].update(val)
                 # Otherwise, just overwrite it. Note if dict is passed empty, it clears the whole dict.
                 else:
-                    setattr(self, prop, val)
+                    state.params[name] = val
+
+                # The hash is calculated when next needed for a fingerprint.
+                state.hashes.pop(name, None)
+
+                dependents = state.dependents.get(name, 0)
+                if not dependents:
+                    return
+
+                if getattr(self, "_profile", None) is not None:
+                    for pr in names_of(dependents):
+                        self._profile.trigger(pr, name)
 
                 # Make sure children are updated
-                if kind != "switch" or doset:  # Normal parameters just update dependencies
-                    for pr in getattr(self, recalc_papr).get(name):
-                        getattr(self, recalc)[pr] = True
+                if kind != "switch":  # Normal parameters just update dependencies
+                    state.stale |= dependents
                 else:  # Switches mean that dependencies could depend on new parameters, so need to re-index
-                    for pr in getattr(self, recalc_papr)[name]:
-                        delattr(self, pr)
+                    for pr in names_of(dependents):
+                        state.forget(pr)
 
         update_wrapper(_set_property, f)
 
+        # Expose the kind and the validating function, so that updates can be planned without setting.
+        _set_property.kind = kind
+        _set_property.validate = f
+
         def _get_property(self):
-            prop = hidden_loc(self, name)
-            recalc_prpa = hidden_loc(self, "recalc_prop_par")
+            state = self._cache_state
+            if state.lock is None:
+                return _get(state)
+            with state.lock:
+                return _get(state)
 
-            # Add parameter to any index that hasn't been finalised
-            for pr, v in getattr(self, recalc_prpa).items():
-                v.add(name)
+        def _get(state):
+            # Add parameter to the index of the quantity being calculated
+            if state.stack:
+                state.stack[-1] |= bit
 
-            return getattr(self, prop)
+            try:
+                return state.params[name]
+            except KeyError:
+                raise AttributeError(name)
 
         # Here we set the documentation
         doc = (f.__doc__ or "").strip()
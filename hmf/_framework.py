@@ -2,7 +2,10 @@
 Classes defining the overall structure of the hmf framework.
 '''
 import copy
+import hashlib
 import sys
+import numpy as np
+from . import _cache
 #from _cache import Cache
 
 class Component(object):
@@ -62,6 +65,43 @@ def get_model(name, mod, **kwargs):
     """
     return get_model_(name,mod)(**kwargs)
 
+class Snapshot(object):
+    """
+    An immutable view of parameters and quantities of a :class:`Framework`.
+
+    Created by :meth:`Framework.snapshot`. Values are accessed as attributes.
+    """
+    def __init__(self, name, values):
+        for k, v in values.items():
+            if isinstance(v, np.ndarray):
+                v = v.view()
+                v.flags.writeable = False
+            values[k] = v
+
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_values", values)
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError("%s snapshot has no attribute '%s'" % (self._name, name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Snapshots are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Snapshots are immutable")
+
+    def __getstate__(self):
+        return self._name, self._values
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __dir__(self):
+        return sorted(self._values)
+
 class Framework(object):
     """
     Class representing a coherent framework of component models.
@@ -76,6 +116,18 @@ class Framework(object):
 
     Importantly, any parameter that may be passed to the constructor, *must* be
     defined as a ``parameter`` within the class so it may be set properly.
+
+    Notes
+    -----
+    By default, instances are not thread-safe: reading a quantity mutates the
+    cache and dependency index. There are two ways to share an instance between threads:
+
+    * Call :meth:`enable_locking`, after which every parameter and quantity access
+      (and every :meth:`update`) is serialised by a per-instance re-entrant lock.
+      To perform an update and subsequent reads atomically, hold :attr:`lock`
+      around them. Locks are re-created in the child process after a ``fork``.
+    * Call :meth:`snapshot`, which evaluates a set of quantities and returns an
+      immutable :class:`Snapshot` of them, which may be read freely from any thread.
     """
     def __init__(self):
         super(Framework, self).__init__()
@@ -84,6 +136,13 @@ class Framework(object):
         """
         Update parameters of the framework with kwargs.
         """
+        lock = self._cache_state.lock
+        if lock is not None:
+            with lock:
+                return self._update(kwargs)
+        return self._update(kwargs)
+
+    def _update(self, kwargs):
         for k, v in list(kwargs.items()):
             if hasattr(self, k):
                 setattr(self, k, v)
@@ -92,11 +151,280 @@ class Framework(object):
         if kwargs:
             raise ValueError("Invalid arguments: %s" % kwargs)
 
+    def fork(self, **kwargs):
+        """
+        Create a new instance from this one, with some parameters updated.
+
+        The new instance shares the cached quantities of this one (as read-only views,
+        without copying any data), so that only quantities invalidated by the updates
+        are re-calculated when accessed. This is much cheaper than a deep copy when
+        exploring many branches from a common, evaluated, state.
+
+        Parameters
+        ----------
+        kwargs :
+            Parameters to update in the new instance (see :meth:`update`).
+
+        Returns
+        -------
+        :class:`Framework`
+            The new instance, of the same class as this one.
+
+        Examples
+        --------
+        >>> mf = MassFunction()
+        >>> mf.dndm
+        >>> fits = dict((fit, mf.fork(hmf_model=fit)) for fit in ["ST", "PS", "Tinker08"])
+        """
+        lock = self._cache_state.lock
+        if lock is not None:
+            with lock:
+                return self._fork(**kwargs)
+        return self._fork(**kwargs)
+
+    def _fork(self, **kwargs):
+        new = copy.copy(self)
+        new._cache_state = self._cache_state.copy()
+        if getattr(self, "_profile", None) is not None:
+            new._profile = _cache.Profile()
+        new.update(**kwargs)
+        return new
+
+    def enable_locking(self, enable=True):
+        """
+        Serialise all access to this instance through a per-instance lock.
+
+        This makes the instance safe to share between threads (see the notes in
+        :class:`Framework`), at the cost of acquiring a re-entrant lock on every access.
+
+        Parameters
+        ----------
+        enable : bool, optional
+            Whether to enable locking.
+        """
+        self._cache_state.set_locking(enable)
+
+    @property
+    def lock(self):
+        """
+        The re-entrant lock serialising access to this instance, or None if locking is not enabled.
+        """
+        return self._cache_state.lock
+
+    def snapshot(self, *quantities):
+        """
+        Evaluate the given quantities and return an immutable view of them.
+
+        The snapshot also holds the current parameter values. Arrays are exposed as
+        read-only views, so no data is copied, while later updates of this instance
+        do not affect the snapshot.
+
+        Parameters
+        ----------
+        quantities : str
+            Names of the quantities to evaluate.
+
+        Returns
+        -------
+        :class:`Snapshot`
+        """
+        lock = self._cache_state.lock
+        if lock is not None:
+            with lock:
+                return self._snapshot(quantities)
+        return self._snapshot(quantities)
+
+    def _snapshot(self, quantities):
+        values = dict((k, copy.copy(v) if isinstance(v, dict) else v) for k, v in self.parameter_values.items())
+        for q in quantities:
+            values[q] = getattr(self, q)
+        return Snapshot(self.__class__.__name__, values)
+
+    def dependency_graph(self, inverse=False):
+        """
+        The dependency graph between parameters and (evaluated) cached quantities.
+
+        Dependencies are indexed when a quantity is first evaluated, so only quantities
+        which have been evaluated at least once appear in the graph.
+
+        Parameters
+        ----------
+        inverse : bool, optional
+            By default, return a mapping of each parameter to the quantities which
+            depend on it. If True, return a mapping of each quantity to the parameters
+            it depends on.
+
+        Returns
+        -------
+        dict
+            Adjacency dict, with sorted lists as values.
+        """
+        state = self._cache_state
+
+        if inverse:
+            return dict((q, sorted(_cache.names_of(mask))) for q, mask in state.deps.items())
+
+        return dict((p, sorted(_cache.names_of(state.dependents.get(p, 0)))) for p in state.params)
+
+    def dependency_dot(self):
+        """
+        The dependency graph (see :meth:`dependency_graph`) in the DOT language.
+
+        Edges point from parameters (drawn as boxes) to the quantities which depend on them.
+        """
+        lines = ["digraph %s {" % self.__class__.__name__]
+        for par, quantities in sorted(self.dependency_graph().items()):
+            lines.append('    "%s" [shape=box];' % par)
+            for q in quantities:
+                lines.append('    "%s" -> "%s";' % (par, q))
+        lines.append("}")
+        return "\n".join(lines)
+
+    def fingerprint(self, quantity=None):
+        """
+        A stable hash of the parameters of this instance.
+
+        Instances of the same class with equal parameters (in this or any other process)
+        have the same fingerprint, so it may be used to key memo tables, caches on disk
+        or results of a sweep. The hash of each parameter value is kept until the
+        parameter is modified, so repeated calls are cheap.
+
+        Parameters
+        ----------
+        quantity : str, optional
+            If given, only the parameters on which this quantity depends are included
+            (and the quantity is evaluated if it has not yet been), giving a key for
+            its value.
+
+        Returns
+        -------
+        str
+            A hexadecimal SHA-1 hash.
+
+        Raises
+        ------
+        TypeError
+            If a relevant parameter is not of a type whose content can be hashed
+            (numbers, strings, arrays and quantities, classes, astropy cosmologies and
+            containers of these).
+        """
+        state = self._cache_state
+        if quantity is None:
+            names = list(state.params)
+        else:
+            if quantity not in state.deps:
+                getattr(self, quantity)
+            names = _cache.names_of(state.deps[quantity])
+
+        cls = self.__class__
+        fp = state.fingerprint(names)
+        return hashlib.sha1(("%s.%s:%s:%s" % (cls.__module__, cls.__name__, quantity, fp)).encode()).hexdigest()
+
+    def plan_update(self, **kwargs):
+        """
+        List the cached quantities which would be invalidated by an update.
+
+        This performs no update, and no calculation. The arguments are validated
+        and compared to the current values exactly as in :meth:`update`.
+
+        Parameters
+        ----------
+        kwargs : unpacked-dict
+            Parameters to update, as they would be passed to :meth:`update`.
+
+        Returns
+        -------
+        list
+            Sorted names of the quantities whose cached values would be discarded.
+        """
+        state = self._cache_state
+
+        out = 0
+        for k, v in kwargs.items():
+            if k not in state.params:
+                raise ValueError("Invalid arguments: %s" % {k: v})
+
+            val = getattr(self.__class__, k).fset.validate(self, v)
+            if not _cache.obj_eq(val, state.params[k]):
+                out |= state.dependents.get(k, 0)
+
+        return sorted(q for q in _cache.names_of(out & ~state.stale) if q in state.values)
+
+    def enable_profiling(self, enable=True):
+        """
+        Turn on (or off) instrumentation of the cached quantities of this instance.
+
+        While enabled, every cached quantity records its number of cache hits and
+        misses, the wall time spent in its own body (excluding nested cached quantities),
+        and the parameters whose updates triggered its re-calculation. See
+        :meth:`profile_report`.
+
+        Parameters
+        ----------
+        enable : bool, optional
+            Whether to enable profiling. Disabling it discards any gathered statistics.
+        """
+        self._profile = _cache.Profile() if enable else None
+
+    def enable_disk_cache(self, directory, quantities=(), max_size=2 ** 30):
+        """
+        Persist the values of selected cached quantities in a directory on disk.
+
+        Each value is stored under a hash of the class, the quantity, and the values of
+        the parameters it depends on, so that any instance (in this or a later run) whose
+        parameters match will load it rather than re-calculate it.
+
+        Parameters
+        ----------
+        directory : str or None
+            The directory of the store (which may be shared by many instances).
+            If None, disk caching is disabled.
+
+        quantities : list of str, optional
+            Names of the cached quantities to store. Good candidates are expensive quantities
+            depending on few parameters, such as ``_unnormalised_lnT`` and ``_unn_sig8`` of
+            :class:`hmf.transfer.Transfer`.
+
+        max_size : int, optional
+            Maximum total size of the store in bytes, beyond which the least-recently
+            used values are removed.
+
+        Notes
+        -----
+        Values are only valid as long as they are fully determined by the parameters.
+        In particular, a :class:`hmf.transfer_models.FromFile` transfer function is keyed
+        on the file name, not its contents.
+        """
+        self._disk_cache = _cache.DiskCache(directory, quantities, max_size) if directory is not None else None
+
+    def reset_profile(self):
+        """
+        Reset the statistics gathered since profiling was enabled.
+        """
+        if getattr(self, "_profile", None) is not None:
+            self._profile = _cache.Profile()
+
+    def profile_report(self):
+        """
+        The statistics gathered since profiling was enabled.
+
+        Returns
+        -------
+        dict
+            For each cached quantity accessed, a dict with entries ``hits``, ``misses``
+            (i.e. evaluations), ``time`` (total seconds spent in the quantity itself,
+            excluding nested cached quantities) and ``triggers`` (a dict of parameter names
+            and how many times their update invalidated the quantity).
+        """
+        if getattr(self, "_profile", None) is None:
+            raise ValueError("Profiling is not enabled. Use enable_profiling() first.")
+        return copy.deepcopy(self._profile.stats)
+
     @classmethod
     def get_all_parameter_names(cls):
         "Yield all parameter names in the class."
         K = cls()
-        return getattr(K,"_"+K.__class__.__name__+"__recalc_par_prop")
+        return list(K._cache_state.params)
 
     @classmethod
     def get_all_parameter_defaults(cls,recursive=True):
@@ -121,7 +449,7 @@ class Framework(object):
     def parameter_values(self):
         "Dictionary of all parameters and their current values"
         out = {}
-        for name in getattr(self,"_"+self.__class__.__name__+"__recalc_par_prop"):
+        for name in self._cache_state.params:
             out[name] = getattr(self,name)
         return out
 
@@ -1,4 +1,6 @@
 from inspect import getmembers, ismethod
+import os
+import tempfile
 
 def inherit_docstrings(cls):
     for name, func in getmembers(cls,ismethod):
@@ -7,4 +9,29 @@ def inherit_docstrings(cls):
         for parent in cls.__mro__[1:]:
             if hasattr(parent, name):
                 func.__func__.__doc__ = getattr(parent, name).__doc__
-    return cls
\ No newline at end of file
+    return cls
+
+
+def atomic_write(fname, write):
+    """
+    Write a file atomically, so that concurrent readers never see a partial file.
+
+    The file is written to a temporary file in the same directory, which is then moved
+    into place (and removed if writing fails).
+
+    Parameters
+    ----------
+    fname : str
+        The file to write.
+
+    write : callable
+        A function which writes the content to the open (binary) file object it is passed.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(fname) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fl:
+            write(fl)
+        os.rename(tmp, fname)
+    except BaseException:
+        os.remove(tmp)
+        raise
@@ -6,7 +6,6 @@ including the popular top-hat in real space.
 import numpy as np
 from scipy.interpolate import InterpolatedUnivariateSpline as _spline
 import scipy.integrate as intg
-import collections
 from . import _framework
 from . import _utils
 import warnings
@@ -32,12 +31,25 @@ class Filter(_framework.Component):
         Wavenumbers at which the power spectrum is defined.
 
     power : array_like
-        The power spectrum at `k`.
+        The power spectrum at `k`. The generic integration routines (:meth:`sigma`,
+        :meth:`dlnss_dlnr`) also accept a stack of power spectra, with shape
+        ``(..., len(k))``, in which case their results gain the same leading axes.
 
     \*\*model_parameters : unpacked-dict
         As for any :class:`hmf._framework.Component` subclass, any particular
         parameters of the model may be passed to the constructor. Allowed
-        parameters are found in the :attr:`~._defaults` attribute.
+        parameters are found in the :attr:`~._defaults` attribute. For filters
+        using the generic integration routines, these are
+
+        :tabulate: bool
+            Whether to serve :meth:`sigma` and :meth:`dlnss_dlnr` from an interpolation
+            table (see below), rather than integrating for every radius. Default False.
+        :tab_rtol: float
+            Target accuracy of the table. Default 1e-4.
+        :chunk_size: int
+            Number of radii integrated at once. Memory usage scales as
+            ``chunk_size * len(k)``. Default None, which chooses a chunk
+            size such that each temporary array is at most ~32 MB.
 
     Notes
     -----
@@ -55,13 +67,46 @@ class Filter(_framework.Component):
 
     The factor :math:`\frac{d\ln R}{d\ln m}` is typically 1/3, but this is not necessarily the
     case for window functions of arbitrary shape.
+
+    When `tabulate` is True, :math:`\ln\sigma(\ln R)` and :math:`d\ln\sigma^2/d\ln R` are
+    integrated once on a grid in :math:`\ln R`, which is refined (by bisection) until cubic
+    spline interpolation between grid points reproduces the integrals at all interval midpoints
+    to within `tab_rtol` (absolute in :math:`\ln\sigma`, i.e. relative in :math:`\sigma`, and
+    relative in the derivative). Since this is only verified at the midpoints, the tolerance is met
+    approximately; in particular, the small non-physical wiggles in the derivative which arise
+    from a coarse k-grid are smoothed over. Any subsequent radii are then served by spline lookup. The grid
+    only covers the radii requested so far, and is extended when necessary. It is discarded
+    whenever `k` or `power` is re-assigned. Tabulation applies only to the zeroth moment, and
+    is not used for stacked power spectra.
     """
+    _defaults = {"tabulate": False, "tab_rtol": 1e-4, "chunk_size": None}
+
     def __init__(self,  k, power, **model_parameters):
         self.k = k
         self.power = power
 
         super(Filter, self).__init__(**model_parameters)
 
+    @property
+    def k(self):
+        "Wavenumbers at which the power spectrum is defined."
+        return self._k
+
+    @k.setter
+    def k(self, val):
+        self._k = val
+        self._sigma_table = None
+
+    @property
+    def power(self):
+        "The power spectrum at `k`."
+        return self._power
+
+    @power.setter
+    def power(self, val):
+        self._power = val
+        self._sigma_table = None
+
     def real_space(self, R, r):
         r"""
         Filter definition in real space.
@@ -180,15 +225,12 @@ class Filter(_framework.Component):
 
         .. math:: \frac{d\ln \sigma^2}{d\ln R} = \frac{1}{\pi^2\sigma^2} \int_0^\infty W(kR) \frac{dW(kR)}{d\ln(kR)} P(k)k^2 dk
         """
-        dlnk = np.log(self.k[1] / self.k[0])
-        s = self.sigma(r)
-        rk = np.outer(r,self.k)
+        if self._use_table:
+            return self._lookup(r)[1]
+        return self._dlnss_dlnr(r)
 
-        rest = self.power * self.k ** 3
-        w = self.k_space(rk)
-        dw = self.dw_dlnkr(rk)
-        integ = w*dw*rest
-        return intg.simps(integ, dx=dlnk,axis=-1) / (np.pi ** 2 * s ** 2)
+    def _dlnss_dlnr(self, r):
+        return self._sigma_and_dlnss_dlnr(r)[1]
 
     def dlnr_dlnm(self, r):
         r"""
@@ -242,16 +284,152 @@ class Filter(_framework.Component):
 
         .. math:: \sigma^2_n(R) = \frac{1}{2\pi^2} \int_0^\infty dk\ k^{2(1+n)} P(k) W^2(kR)
         """
+        if self._use_table and order == 0 and rk is None:
+            return np.exp(self._lookup(r)[0])
+        return self._sigma(r, order, rk)
+
+    def _sigma(self, r, order=0, rk=None):
+        # we multiply by k because our steps are in logk.
+        rest = self.power[..., None, :] * self.k ** (3 + order * 2)
+
         if rk is None:
-            rk = np.outer(r,self.k)
+            sigma = self._integrate_chunked(r, lambda rk: (rest*self.k_space(rk)**2,))[0]
+        else:
+            dlnk = np.log(self.k[1] / self.k[0])
+            sigma = intg.simps(rest*self.k_space(rk)**2, dx=dlnk, axis=-1)
+
+        return np.sqrt((0.5/np.pi**2) * sigma)
+
+    def sigma_and_derivative(self, r):
+        r"""
+        Calculate both the mass variance and its logarithmic derivative in a single pass.
+
+        This is equivalent to ``(self.sigma(r), self.dlnss_dlnr(r))``, but for
+        the generic integrals the window function is evaluated only once for each
+        :math:`kR`, and both integrals are performed together.
+
+        Parameters
+        ----------
+        r : array_like
+            Radii
+
+        Returns
+        -------
+        sigma : array_like
+            The mass variance, :math:`\sigma(r)`.
+
+        dlnss_dlnr : array_like
+            The derivative :math:`\frac{d\ln \sigma^2}{d\ln R}`.
+        """
+        # Subclasses with specialised integrals are just called directly.
+        if type(self).sigma is not Filter.sigma or type(self).dlnss_dlnr is not Filter.dlnss_dlnr:
+            return self.sigma(r), self.dlnss_dlnr(r)
+
+        if self._use_table:
+            lnsig, dlnss = self._lookup(r)
+            return np.exp(lnsig), dlnss
+        return self._sigma_and_dlnss_dlnr(r)
+
+    def _sigma_and_dlnss_dlnr(self, r):
+        rest = self.power[..., None, :] * self.k ** 3
+
+        def integrand(rk):
+            w = self.k_space(rk)
+            return rest * w**2, rest * w * self.dw_dlnkr(rk)
+
+        ss, dss = self._integrate_chunked(r, integrand)
+        ss *= 0.5 / np.pi ** 2
+        return np.sqrt(ss), dss / (np.pi ** 2 * ss)
+
+    def _integrate_chunked(self, r, integrand):
+        """
+        Integrate each of the arrays returned by ``integrand(rk)`` over ln(k), for each of the radii `r`.
 
+        The radii are processed in chunks of `chunk_size`, re-using a single buffer
+        for the ``rk`` matrix, so that memory usage is bounded by the chunk size
+        rather than the number of radii.
+        """
+        r = np.atleast_1d(r)
         dlnk = np.log(self.k[1] / self.k[0])
 
-        # we multiply by k because our steps are in logk.
-        rest = self.power * self.k ** (3 + order * 2)
-        integ = rest*self.k_space(rk)**2
-        sigma = (0.5/np.pi**2) * intg.simps(integ,dx=dlnk,axis=-1)
-        return np.sqrt(sigma)
+        chunk = self.params.get("chunk_size") or max(1, 2 ** 22 // len(self.k))
+        chunk = max(1, min(chunk, len(r)))
+
+        out = None
+        rk = np.empty((chunk, len(self.k)))
+        for i in range(0, len(r), chunk):
+            rr = r[i:i + chunk]
+            np.multiply.outer(rr, self.k, out=rk[:len(rr)])
+            integs = integrand(rk[:len(rr)])
+            if out is None:
+                out = [np.empty(np.shape(integ)[:-2] + (len(r),)) for integ in integs]
+            for o, integ in zip(out, integs):
+                o[..., i:i + chunk] = intg.simps(integ, dx=dlnk, axis=-1)
+
+        if out is None:  # No radii
+            out = [np.empty(np.shape(integ)[:-2] + (0,)) for integ in integrand(rk[:0])]
+
+        return out
+
+    @property
+    def _use_table(self):
+        return self.params.get("tabulate", False) and np.ndim(self.power) == 1
+
+    def _lookup(self, r):
+        """
+        Interpolate ln(sigma) and dln(sigma^2)/dln(r) from the table, extending it if required.
+        """
+        lnr = np.log(np.atleast_1d(r))
+
+        if self._sigma_table is None:
+            self._build_table(lnr.min() - 0.5, lnr.max() + 0.5)
+        else:
+            lo, hi = self._sigma_table[0][[0, -1]]
+            if lnr.min() < lo or lnr.max() > hi:
+                self._build_table(min(lo, lnr.min() - 0.5), max(hi, lnr.max() + 0.5))
+
+        lnsig, dlnss = self._sigma_table[1:]
+        return lnsig(lnr), dlnss(lnr)
+
+    def _build_table(self, lnr_min, lnr_max, max_iter=30, min_dlnr=1e-3):
+        """
+        Build the adaptive interpolation table of sigma and its derivative between given log radii.
+        """
+        rtol = self.params['tab_rtol']
+
+        lnr = np.linspace(lnr_min, lnr_max, max(int((lnr_max - lnr_min) / 0.5), 4) + 1)
+        sig, dlnss = self._sigma_and_dlnss_dlnr(np.exp(lnr))
+        lnsig = np.log(sig)
+
+        for i in range(max_iter):
+            lnsig_fnc = _spline(lnr, lnsig)
+            dlnss_fnc = _spline(lnr, dlnss)
+
+            # Check the interpolation against the integral at the midpoint of each interval.
+            mid = (lnr[1:] + lnr[:-1]) / 2
+            sig_mid, dlnss_mid = self._sigma_and_dlnss_dlnr(np.exp(mid))
+            lnsig_mid = np.log(sig_mid)
+
+            bad = np.logical_or(np.abs(lnsig_fnc(mid) - lnsig_mid) > rtol,
+                                np.abs(dlnss_fnc(mid) - dlnss_mid) > rtol * np.abs(dlnss_mid))
+            if not np.any(bad):
+                break
+
+            # Don't chase numerical noise in the integrals down to arbitrarily small intervals.
+            bad = np.logical_and(bad, np.diff(lnr) > min_dlnr)
+            if not np.any(bad):
+                warnings.warn("sigma table did not converge to tab_rtol=%s" % rtol)
+                break
+
+            lnr = np.concatenate((lnr, mid[bad]))
+            indx = np.argsort(lnr)
+            lnr = lnr[indx]
+            lnsig = np.concatenate((lnsig, lnsig_mid[bad]))[indx]
+            dlnss = np.concatenate((dlnss, dlnss_mid[bad]))[indx]
+        else:
+            warnings.warn("sigma table did not converge to tab_rtol=%s" % rtol)
+
+        self._sigma_table = (lnr, lnsig_fnc, dlnss_fnc)
 
     def nu(self, r,delta_c=1.686):
         r"""
@@ -402,9 +580,12 @@ class SharpK(Filter):
         return np.where(kr==1,1.0,0.0)
 
     def dlnss_dlnr(self, r):
+        return self.sigma_and_derivative(r)[1]
+
+    def sigma_and_derivative(self, r):
         sigma = self.sigma(r)
         power = _spline(self.k, self.power)(1 / r)
-        return -power / (2 * np.pi ** 2 * sigma ** 2 * r ** 3)
+        return sigma, -power / (2 * np.pi ** 2 * sigma ** 2 * r ** 3)
 
     def mass_to_radius(self, m,rho_mean):
         return (1. / self.params['c']) * (3.*m / (4.*np.pi * rho_mean)) ** (1. / 3.)
@@ -413,23 +594,17 @@ class SharpK(Filter):
         return 4 * np.pi * (self.params['c'] * r) ** 3 * rho_mean / 3
 
     def sigma(self, r, order=0):
-        if not isinstance(r, collections.Iterable):
-            r = np.atleast_1d(r)
+        r = np.atleast_1d(r)
 
         if self.k.max() < 1/r.min():
             warnings.warn("Warning: Maximum r*k less than 1!")
 
-        # # Need to re-define this because the integral needs to go exactly kr=1
-        # # or else the function 'jitters'
-        sigma = np.zeros(len(r))
-        power = _spline(self.k, self.power)
-        for i, rr in enumerate(r):
-            k = np.logspace(np.log10(self.k[0]), min(np.log10(self.k.max()),np.log10(1.0 / rr)), max(100,len(self.k)-i))
-
-            p = power(k)
-            dlnk = np.log(k[1] / k[0])
-            integ = p * k ** (3 + 2 * order)
-            sigma[i] = (0.5 / (np.pi ** 2)) * intg.simps(integ, dx=dlnk)
+        # # The integral needs to go exactly to kr=1 or else the function 'jitters',
+        # # so we integrate a spline of the integrand (in ln k) analytically up to ln(1/r).
+        lnk = np.log(self.k)
+        integ = _spline(lnk, self.power * self.k ** (3 + 2 * order)).antiderivative()
+        lnk_max = np.clip(-np.log(r), lnk[0], lnk[-1])
+        sigma = (0.5 / (np.pi ** 2)) * (integ(lnk_max) - integ(lnk[0]))
 
         return np.sqrt(sigma)
 
@@ -505,10 +680,13 @@ class SharpKEllipsoid(SharpK):
         s = _spline(a3, r)
         return s
 
+    def sigma_and_derivative(self, r):
+        return self.sigma(r), self.dlnss_dlnr(r)
+
     def dlnss_dlnr(self, r):
         a3 = self.a3(r)
         sigma = self.sigma(a3)
-        power = np.exp(_spline(self.lnk, self.lnp)(np.log(1 / a3)))
+        power = np.exp(_spline(np.log(self.k), np.log(self.power))(np.log(1 / a3)))
         return -power / (2 * np.pi ** 2 * sigma ** 2 * a3 ** 3)
 
     def dlnr_dlnm(self, r):
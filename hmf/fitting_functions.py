@@ -13,6 +13,55 @@ from . import _framework
 from copy import copy
 from . import _utils
 
+# Cubic-spline interpolation operators for tabulated coefficients, keyed on the tabulated abscissae.
+_spline_bases = {}
+
+
+def _spline_basis(x):
+    """
+    The interpolating cubic spline through points `x` as a linear operator on the values there.
+
+    Returns the midpoints of the intervals between `x`, and for each interval, the Taylor
+    coefficients about its midpoint of the splines through each unit vector, with shape
+    ``(len(x) - 1, 4, len(x))``. These depend only on `x`, so are calculated only once.
+    """
+    key = tuple(x)
+    if key not in _spline_bases:
+        mid = (x[1:] + x[:-1]) / 2.0
+        basis = np.empty((len(mid), 4, len(x)))
+        for j, unit in enumerate(np.eye(len(x))):
+            spl = _spline(x, unit)
+            for i, m in enumerate(mid):
+                basis[i, :, j] = spl.derivatives(m) / [1.0, 1.0, 2.0, 6.0]
+        _spline_bases[key] = (mid, basis)
+    return _spline_bases[key]
+
+
+def _coefficients(params, names, delta_virs, delta_halo):
+    """
+    The coefficients `names` of a fit tabulated at overdensities `delta_virs`, at `delta_halo`.
+
+    The tabulated values are ``params["<name>_<delta_vir>"]``. They are used directly where
+    `delta_halo` is one of `delta_virs`, and otherwise interpolated with a cubic spline
+    (evaluated for all coefficients at once). `delta_halo` may be an array.
+    """
+    if not np.ndim(delta_halo) and delta_halo in delta_virs:
+        return [params["%s_%s" % (name, int(delta_halo))] for name in names]
+
+    mid, basis = _spline_basis(delta_virs)
+    table = np.array([[params["%s_%s" % (name, d)] for d in delta_virs] for name in names])
+
+    # Evaluate the (cubic) weight of each tabulated value at delta_halo
+    dh = np.asarray(delta_halo, dtype=float)
+    i = np.clip(np.searchsorted(delta_virs, dh) - 1, 0, len(mid) - 1)
+    t = (dh - mid[i])[..., None]
+    weights = ((basis[i, 3] * t + basis[i, 2]) * t + basis[i, 1]) * t + basis[i, 0]
+    out = np.dot(weights, table.T)
+
+    idx = np.minimum(np.searchsorted(delta_virs, dh), len(delta_virs) - 1)
+    out = np.where((delta_virs[idx] == dh)[..., None], table.T[idx], out)
+    return list(np.moveaxis(out, -1, 0))
+
 
 
 class SimDetails(object):
@@ -276,7 +325,7 @@ class FittingFunction(_framework.Component):
         A logical mask array specifying which elements of :attr:`fsigma` are within
         the fitted range.
         """
-        return np.ones(len(self.nu2), dtype=bool)
+        return np.ones(np.shape(self.nu2), dtype=bool)
 
     @property
     def fsigma(self):
@@ -664,22 +713,19 @@ class Watson(FittingFunction):
 
     @property
     def fsigma(self):
-        if self.z == 0:
-            A = self.params["A_0"]
-            alpha = self.params["alpha_0"]
-            beta = self.params["beta_0"]
-            gamma = self.params["gamma_0"]
-        elif self.z >= self.params['z_hi']:
-            A = self.params["A_hi"]
-            alpha = self.params["alpha_hi"]
-            beta = self.params["beta_hi"]
-            gamma = self.params["gamma_hi"]
-        else:
-            omz = self.omegam_z
-            A = omz*(self.params["A_a"]*(1 + self.z)**(-self.params["A_b"]) + self.params["A_c"])
-            alpha = omz*(self.params["alpha_a"]*(1 + self.z)**(-self.params["alpha_b"]) + self.params["alpha_c"])
-            beta = omz*(self.params["beta_a"]*(1 + self.z)**(-self.params["beta_b"]) + self.params["beta_c"])
-            gamma = self.params["gamma_z"]
+        # Each coefficient takes one of three forms, depending on the redshift
+        # regime. These are selected element-wise so that `z` may be an array.
+        z0 = self.z == 0
+        zhi = self.z >= self.params['z_hi']
+        omz = self.omegam_z
+
+        def _select(name, mid):
+            return np.where(z0, self.params[name + "_0"], np.where(zhi, self.params[name + "_hi"], mid))
+
+        A = _select("A", omz*(self.params["A_a"]*(1 + self.z)**(-self.params["A_b"]) + self.params["A_c"]))
+        alpha = _select("alpha", omz*(self.params["alpha_a"]*(1 + self.z)**(-self.params["alpha_b"]) + self.params["alpha_c"]))
+        beta = _select("beta", omz*(self.params["beta_a"]*(1 + self.z)**(-self.params["beta_b"]) + self.params["beta_c"]))
+        gamma = _select("gamma", self.params["gamma_z"])
 
         return self.gamma()*A*((beta/self.sigma)**alpha + 1)* \
                np.exp(-gamma/self.sigma**2)
@@ -894,26 +940,7 @@ class Tinker08(FittingFunction):
     def __init__(self, **model_parameters):
         super(Tinker08, self).__init__(**model_parameters)
 
-        if self.delta_halo not in self.delta_virs:
-            A_array = np.array([self.params["A_%s"%d] for d in self.delta_virs])
-            a_array = np.array([self.params["a_%s"%d] for d in self.delta_virs])
-            b_array = np.array([self.params["b_%s"%d] for d in self.delta_virs])
-            c_array = np.array([self.params["c_%s"%d] for d in self.delta_virs])
-
-            A_func = _spline(self.delta_virs, A_array)
-            a_func = _spline(self.delta_virs, a_array)
-            b_func = _spline(self.delta_virs, b_array)
-            c_func = _spline(self.delta_virs, c_array)
-
-            A_0 = A_func(self.delta_halo)
-            a_0 = a_func(self.delta_halo)
-            b_0 = b_func(self.delta_halo)
-            c_0 = c_func(self.delta_halo)
-        else:
-            A_0 = self.params["A_%s"%(int(self.delta_halo))]
-            a_0 = self.params["a_%s"%(int(self.delta_halo))]
-            b_0 = self.params["b_%s"%(int(self.delta_halo))]
-            c_0 = self.params["c_%s"%(int(self.delta_halo))]
+        A_0, a_0, b_0, c_0 = _coefficients(self.params, ["A", "a", "b", "c"], self.delta_virs, self.delta_halo)
 
         self.A = A_0*(1 + self.z)**(-self.params["A_exp"])
         self.a = a_0*(1 + self.z)**(-self.params["a_exp"])
@@ -927,12 +954,9 @@ class Tinker08(FittingFunction):
 
     @property
     def cutmask(self):
-        if self.z == 0.0:
-            return np.logical_and(self.lnsigma/np.log(10) > -0.6,
-                                  self.lnsigma/np.log(10) < 0.4)
-        else:
-            return np.logical_and(self.lnsigma/np.log(10) > -0.2,
-                                  self.lnsigma/np.log(10) < 0.4)
+        lower = np.where(self.z == 0.0, -0.6, -0.2)
+        return np.logical_and(self.lnsigma/np.log(10) > lower,
+                              self.lnsigma/np.log(10) < 0.4)
 
 
 class Tinker10(FittingFunction):
@@ -976,67 +1000,65 @@ class Tinker10(FittingFunction):
     def __init__(self, **model_parameters):
         super(Tinker10, self).__init__(**model_parameters)
 
-        if self.delta_halo not in self.delta_virs:
-            beta_array = np.array([self.params["beta_%s"%d] for d in self.delta_virs])
-            gamma_array = np.array([self.params["gamma_%s"%d] for d in self.delta_virs])
-            phi_array = np.array([self.params["phi_%s"%d] for d in self.delta_virs])
-            eta_array = np.array([self.params["eta_%s"%d] for d in self.delta_virs])
-
-            beta_func = _spline(self.delta_virs, beta_array)
-            gamma_func = _spline(self.delta_virs, gamma_array)
-            phi_func = _spline(self.delta_virs, phi_array)
-            eta_func = _spline(self.delta_virs, eta_array)
-
-            beta_0 = beta_func(self.delta_halo)
-            gamma_0 = gamma_func(self.delta_halo)
-            phi_0 = phi_func(self.delta_halo)
-            eta_0 = eta_func(self.delta_halo)
-        else:
-            beta_0 = self.params['beta_%s'%(int(self.delta_halo))]
-            gamma_0 = self.params['gamma_%s'%(int(self.delta_halo))]
-            phi_0 = self.params['phi_%s'%(int(self.delta_halo))]
-            eta_0 = self.params['eta_%s'%(int(self.delta_halo))]
+        beta_0, gamma_0, phi_0, eta_0 = _coefficients(self.params, ["beta", "gamma", "phi", "eta"],
+                                                      self.delta_virs, self.delta_halo)
 
-        self.beta = beta_0*(1 + min(self.z, self.params["max_z"]))**self.params["beta_exp"]
-        self.phi = phi_0*(1 + min(self.z, self.params["max_z"]))**self.params['phi_exp']
-        self.eta = eta_0*(1 + min(self.z, self.params["max_z"]))**self.params['eta_exp']
-        self.gamma = gamma_0*(1 + min(self.z, self.params["max_z"]))**self.params['gamma_exp']
+        zmax = np.minimum(self.z, self.params["max_z"])
+        self.beta = beta_0*(1 + zmax)**self.params["beta_exp"]
+        self.phi = phi_0*(1 + zmax)**self.params['phi_exp']
+        self.eta = eta_0*(1 + zmax)**self.params['eta_exp']
+        self.gamma = gamma_0*(1 + zmax)**self.params['gamma_exp']
 
         # # The normalisation only works with specific conditions
         # gamma > 0
-        if self.gamma <= 0:
+        if np.any(self.gamma <= 0):
             if self.terminate:
                 raise ValueError("gamma must be > 0, got " + str(self.gamma))
             else:
-                self.gamma = 1e-3
+                self.gamma = np.where(self.gamma <= 0, 1e-3, self.gamma)
         # eta >-0.5
-        if self.eta <= -0.5:
+        if np.any(self.eta <= -0.5):
             if self.terminate:
                 raise ValueError("eta must be > -0.5, got " + str(self.eta))
             else:
-                self.eta = -0.499
+                self.eta = np.where(self.eta <= -0.5, -0.499, self.eta)
         # eta-phi >-0.5
-        if self.eta - self.phi <= -0.5:
+        if np.any(self.eta - self.phi <= -0.5):
             if self.terminate:
                 raise ValueError("eta-phi must be >-0.5, got " + str(self.eta - self.phi))
             else:
-                self.phi = self.eta + 0.499
-        if self.beta <= 0:
+                self.phi = np.where(self.eta - self.phi <= -0.5, self.eta + 0.499, self.phi)
+        if np.any(self.beta <= 0):
             if self.terminate:
                 raise ValueError("beta must be > 0, got " + str(self.beta))
             else:
-                self.beta = 1e-3
+                self.beta = np.where(self.beta <= 0, 1e-3, self.beta)
 
     @property
     def normalise(self):
-        if self.delta_halo in self.delta_virs and self.z == 0:
-            return self.params['alpha_%s'%(int(self.delta_halo))]
+        # Calculated once per instance, as it is independent of nu.
+        try:
+            return self._normalise
+        except AttributeError:
+            pass
+
+        # At z=0 and a tabulated overdensity, the tabulated value is used.
+        idx = np.minimum(np.searchsorted(self.delta_virs, self.delta_halo), len(self.delta_virs) - 1)
+        tabulated = (self.delta_virs[idx] == self.delta_halo) & (np.asarray(self.z) == 0)
+        if tabulated.all():
+            norm = _coefficients(self.params, ["alpha"], self.delta_virs, self.delta_halo)[0]
         else:
-            return 1/(2**(self.eta - self.phi - 0.5)*self.beta**(-2*self.phi) \
+            norm = 1/(2**(self.eta - self.phi - 0.5)*self.beta**(-2*self.phi) \
                       *self.gamma**(-0.5 - self.eta)*(2**self.phi*self.beta**(2*self.phi) \
                                                       *sp.gamma(self.eta + 0.5) + self.gamma**self.phi*sp.gamma(
                 0.5 + self.eta - self.phi)))
 
+            if tabulated.any():
+                norm = np.where(tabulated, _coefficients(self.params, ["alpha"], self.delta_virs, self.delta_halo)[0], norm)
+
+        self._normalise = norm
+        return norm
+
     @property
     def fsigma(self):
         fv = (1 + (self.beta*self.nu)**(-2*self.phi))* \
@@ -1046,12 +1068,9 @@ class Tinker10(FittingFunction):
 
     @property
     def cutmask(self):
-        if self.z == 0.0:
-            return np.logical_and(self.lnsigma/np.log(10) > -0.6,
-                                  self.lnsigma/np.log(10) < 0.4)
-        else:
-            return np.logical_and(self.lnsigma/np.log(10) > -0.2,
-                                  self.lnsigma/np.log(10) < 0.4)
+        lower = np.where(self.z == 0.0, -0.6, -0.2)
+        return np.logical_and(self.lnsigma/np.log(10) > lower,
+                              self.lnsigma/np.log(10) < 0.4)
 
 
 class Behroozi(Tinker10):
@@ -13,6 +13,10 @@ functions to determine that order, and indeed perform the loops.
 import collections
 from . import hmf
 import itertools
+import numbers
+import os
+from types import MappingProxyType
+import numpy as np
 
 
 # ===============================================================================
@@ -68,7 +72,7 @@ def get_best_param_order(kls, q="dndm", **kwargs):
 
     final_list = []
     final_num = []
-    for k, v in getattr(a,"_"+a.__class__.__name__+"__recalc_par_prop").items():
+    for k, v in a.dependency_graph().items():
         num = len(v)
         for i, l in enumerate(final_num):
             if l >= num:
@@ -90,6 +94,7 @@ def get_hmf(req_qauntities, get_label=True, framework=hmf.MassFunction,
                          "Mmin": 10,
                          "Mmax": 11.5,
                          "dlog10m": 0.5},
+            executor=None, n_workers=None, records=False, output_dir=None,
             **kwargs):
     """
     Yield framework instances for all combinations of parameters supplied.
@@ -123,6 +128,30 @@ def get_hmf(req_qauntities, get_label=True, framework=hmf.MassFunction,
         the final result. This will need to be over-ridden for frameworks other
         than :class:`hmf.MassFunction`.
 
+    executor : :class:`concurrent.futures.Executor` instance, optional
+        If given, the combinations are partitioned along the outer-most loop, and
+        each partition is calculated in a separate task of the executor, with its
+        own incrementally-updated instance. Results are still yielded in the
+        original order.
+
+    n_workers : int, optional
+        If given (and `executor` is not), a :class:`concurrent.futures.ProcessPoolExecutor`
+        with this many workers is used as the `executor`.
+
+    records : bool, optional
+        If True, yield a :class:`SweepResult` for each combination instead of the
+        ``[quantities, x, label]`` lists described below. These are small, immutable
+        and picklable, and so may be safely kept (unlike the yielded framework instance,
+        which is updated in-place by the next iteration).
+
+    output_dir : str, optional
+        If given, the requested quantities are also written into a :class:`ColumnarSink`
+        in this (new or empty) directory as each combination is calculated, so that the results of
+        large sweeps need not be kept in memory. Note that the sweep must still be
+        iterated over for anything to be calculated. Each quantity must have the same
+        shape for every combination, so that parameters which change the length of
+        quantities (eg. `Mmin`, `Mmax` or `dlog10m`) cannot be swept.
+
     kwargs : unpacked-dict
         Any of the parameters to the initialiser of `framework` which should be
         calculated. These may be scalar or lists. The total number of calculations
@@ -135,11 +164,17 @@ def get_hmf(req_qauntities, get_label=True, framework=hmf.MassFunction,
 
     x : Framework instance
         An instance of `framework`, with the requisitie quantities pre-cached.
+        If `executor` or `n_workers` is given, this is instead an immutable
+        :class:`hmf._framework.Snapshot` of the worker's instance, holding the
+        requested quantities.
 
     label : optional
         If `get_label` is True, also returns a string label uniquely specifying
         the current parameter combination.
 
+    result : :class:`SweepResult`
+        Yielded instead of the above if `records` is True.
+
     Examples
     --------
     The following operation will run 12 iterations, yielding the desired quantities,
@@ -165,9 +200,90 @@ def get_hmf(req_qauntities, get_label=True, framework=hmf.MassFunction,
     >>> big_list = list(get_hmf('mean_density',z=range(8)))
     >>> print [x[0][0]/1e10 for x in big_list]
     [8.531878308131338, 68.2550264650507, 230.36071431954613, 546.0402117204056, 1066.4847885164174, 1842.885714556369, 2926.434259689049, 4368.321693763245]
+
+    The same sweep, spread over four processes:
+
+    >>> for quants, snapshot, label in get_hmf('dndm', z=range(3), sigma_8=[0.7, 0.8], n_workers=4):
+    >>>     print label
+
+    Or written straight to disk, and read back as memory-mapped arrays:
+
+    >>> for _ in get_hmf(['dndm', 'ngtm'], z=range(3), sigma_8=[0.7, 0.8], output_dir="sweep", records=True):
+    >>>     pass
+    >>> params, done, columns = read_sweep("sweep")
+    >>> print columns['dndm'].shape
+    (6, 401)
     """
     if isinstance(req_qauntities, str):
         req_qauntities = [req_qauntities]
+
+    final_list = _get_combinations(req_qauntities, framework, fast_kwargs, kwargs)
+
+    sink = ColumnarSink(output_dir, req_qauntities, final_list) if output_dir is not None else None
+
+    try:
+        for i, (vals, quants, x) in enumerate(_calculate(framework, kwargs, final_list, req_qauntities,
+                                                         executor, n_workers, not records)):
+            if sink is not None:
+                sink.write(i, quants)
+
+            if records:
+                yield SweepResult(vals, _make_label(vals), req_qauntities, quants)
+                continue
+
+            out = [quants, x]
+            if get_label:
+                out.append(_make_label(vals))
+            yield out
+    finally:
+        if sink is not None:
+            sink.flush()
+
+
+def _calculate(framework, kwargs, final_list, req_qauntities, executor, n_workers, instances):
+    """
+    Yield the parameters, requested quantities and instance (or snapshot, if parallel) for each
+    combination in `final_list`, in order.
+    """
+    if executor is None and n_workers is None:
+        x = framework(**kwargs)
+        for vals in final_list:
+            x.update(**vals)
+            yield vals, [getattr(x, q) for q in req_qauntities], x
+        return
+
+    if executor is None:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = executor = ProcessPoolExecutor(n_workers)
+    else:
+        pool = None
+
+    try:
+        # Partition along the outer-most loop, keeping the cache-friendly order within each partition.
+        partitions = []
+        for vals in final_list:
+            outer = list(vals.values())[:1]
+            if partitions and list(partitions[-1][-1].values())[:1] == outer:
+                partitions[-1].append(vals)
+            else:
+                partitions.append([vals])
+
+        futures = [executor.submit(_sweep, framework, kwargs, part, req_qauntities, instances)
+                   for part in partitions]
+
+        for part, fut in zip(partitions, futures):
+            for vals, (quants, snapshot) in zip(part, fut.result()):
+                yield vals, quants, snapshot
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def _get_combinations(req_qauntities, framework, fast_kwargs, kwargs):
+    """
+    Pop list-valued parameters from `kwargs`, and return all their combinations
+    as a list of ordered dicts, in an optimal order.
+    """
     lists = {}
     for k, v in list(kwargs.items()):
         if isinstance(v, (list, tuple)):
@@ -176,49 +292,217 @@ def get_hmf(req_qauntities, get_label=True, framework=hmf.MassFunction,
             else:
                 kwargs[k] = v[0]
 
-    x = framework(**kwargs)
     if not lists:
-        if get_label:
-            yield [[getattr(x, a) for a in req_qauntities], x, ""]
-        else:
-            yield [[getattr(x, a) for a in req_qauntities], x]
+        return [collections.OrderedDict()]
 
     if len(lists) == 1:
-        for k, v in lists.items():
-            for vv in v:
-                x.update(**{k: vv})
-                if get_label:
-                    yield [getattr(x, a) for a in req_qauntities], x, _make_label({k: vv})
-                else:
-                    yield [getattr(x, a) for a in req_qauntities], x
-    elif len(lists) > 1:
-        # should be really fast.
-        order = get_best_param_order(framework, req_qauntities,
-                                     **fast_kwargs)
-
-        ordered_kwargs = collections.OrderedDict([])
-        for item in order:
-            try:
-                if isinstance(lists[item], (list, tuple)):
-                    ordered_kwargs[item] = lists.pop(item)
-            except KeyError:
-                pass
-
-        # # add the rest in any order (there shouldn't actually be any)
-        for k in list(lists.items()):
-            if isinstance(lists[k], (list, tuple)):
-                ordered_kwargs[k] = lists.pop(k)
-
-        ordered_list = [ordered_kwargs[k] for k in ordered_kwargs]
-        final_list = [collections.OrderedDict(list(zip(list(ordered_kwargs.keys()), v))) for v in itertools.product(*ordered_list)]
+        k, v = list(lists.items())[0]
+        return [collections.OrderedDict([(k, vv)]) for vv in v]
 
-        for vals in final_list:
-            x.update(**vals)
-            if not get_label:
-                yield [[getattr(x, q) for q in req_qauntities], x]
+    # should be really fast.
+    order = get_best_param_order(framework, req_qauntities,
+                                 **fast_kwargs)
 
-            else:
-                yield [[getattr(x, q) for q in req_qauntities], x, _make_label(vals)]
+    ordered_kwargs = collections.OrderedDict([])
+    for item in order:
+        try:
+            if isinstance(lists[item], (list, tuple)):
+                ordered_kwargs[item] = lists.pop(item)
+        except KeyError:
+            pass
+
+    # # add the rest in any order (there shouldn't actually be any)
+    for k in list(lists.keys()):
+        ordered_kwargs[k] = lists.pop(k)
+
+    ordered_list = [ordered_kwargs[k] for k in ordered_kwargs]
+    return [collections.OrderedDict(list(zip(list(ordered_kwargs.keys()), v))) for v in itertools.product(*ordered_list)]
+
+
+def _sweep(framework, kwargs, final_list, req_qauntities, snapshot=True):
+    """
+    Calculate the requested quantities for a list of parameter combinations, in a single instance.
+
+    This is the task performed by each worker in a parallel :func:`get_hmf`.
+    """
+    x = framework(**kwargs)
+    out = []
+    for vals in final_list:
+        x.update(**vals)
+        out.append(([getattr(x, q) for q in req_qauntities], x.snapshot(*req_qauntities) if snapshot else None))
+    return out
+
+
+class SweepResult(object):
+    """
+    An immutable record of the requested quantities for one combination of parameters in :func:`get_hmf`.
+
+    Requested quantities are available as attributes (as read-only arrays), as well as:
+
+    Attributes
+    ----------
+    params : read-only dict
+        The values of the parameters that are varied in the sweep.
+
+    label : str
+        A string label uniquely specifying the parameter combination.
+    """
+    __slots__ = ("params", "label", "_names", "_values")
+
+    def __init__(self, params, label, names, values):
+        values = [np.asarray(v).view() for v in values]
+        for v in values:
+            v.flags.writeable = False
+
+        params = dict((k, MappingProxyType(dict(v)) if isinstance(v, dict) else v) for k, v in params.items())
+        object.__setattr__(self, "params", MappingProxyType(params))
+        object.__setattr__(self, "label", label)
+        object.__setattr__(self, "_names", tuple(names))
+        object.__setattr__(self, "_values", tuple(values))
+
+    def __getattr__(self, name):
+        try:
+            return self._values[self._names.index(name)]
+        except ValueError:
+            raise AttributeError("SweepResult has no attribute '%s'" % name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SweepResult is immutable")
+
+    def __reduce__(self):
+        params = dict((k, dict(v) if isinstance(v, MappingProxyType) else v) for k, v in self.params.items())
+        return SweepResult, (params, self.label, self._names, self._values)
+
+    def __repr__(self):
+        return "SweepResult(%s; %s)" % (self.label, ", ".join(self._names))
+
+
+class ColumnarSink(object):
+    """
+    An on-disk, columnar store for the results of a sweep over parameter combinations.
+
+    The store is a directory containing one ``.npy`` file per quantity, each of shape
+    ``(ncombos,) + shape``, a structured-array table of the varied parameters
+    (``params.npy``) and a boolean mask of completed rows (``done.npy``). Quantity
+    files are memory-mapped and pre-allocated when the first row is written, so
+    memory use does not grow with the number of combinations, and rows written
+    before an interruption remain on disk. Use :func:`read_sweep` to read it back.
+
+    Parameters
+    ----------
+    directory : str
+        The directory in which to write the store. It is created if necessary, and
+        must otherwise be empty.
+
+    quantities : list of str
+        The names of the quantities to store.
+
+    combinations : list of dict
+        The parameter values of each row, in order.
+    """
+    def __init__(self, directory, quantities, combinations):
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        elif os.listdir(directory):
+            raise ValueError("output directory %s is not empty" % directory)
+
+        self.directory = directory
+        self.quantities = list(quantities)
+        self.params = _param_table(combinations)
+        np.save(os.path.join(directory, "params.npy"), self.params)
+
+        self.done = np.lib.format.open_memmap(os.path.join(directory, "done.npy"), mode="w+",
+                                              dtype=bool, shape=(len(combinations),))
+        self.columns = {}
+
+    def write(self, i, values):
+        """
+        Write the `values` of each quantity for the `i`-th combination.
+
+        Raises ValueError, before anything is written, if a value does not have the shape
+        of the values of that quantity in previous rows.
+        """
+        values = [np.asarray(v) for v in values]
+        for q, v in zip(self.quantities, values):
+            if q in self.columns and v.shape != self.columns[q].shape[1:]:
+                raise ValueError("quantity '%s' has shape %s for combination %s, but %s previously. "
+                                 "Quantities must have the same shape for every combination"
+                                 % (q, v.shape, i, self.columns[q].shape[1:]))
+
+        for q, v in zip(self.quantities, values):
+            if q not in self.columns:
+                if v.dtype.hasobject:
+                    raise ValueError("quantity '%s' is not numerical, and cannot be stored" % q)
+                self.columns[q] = np.lib.format.open_memmap(os.path.join(self.directory, q + ".npy"), mode="w+",
+                                                            dtype=v.dtype, shape=(len(self.done),) + v.shape)
+            self.columns[q][i] = v
+
+        # Marked only once the row is complete. The mappings are shared, so written pages
+        # survive the process being killed even before they are flushed.
+        self.done[i] = True
+
+    def flush(self):
+        """
+        Flush all written rows to disk.
+        """
+        for col in self.columns.values():
+            col.flush()
+        self.done.flush()
+
+
+def read_sweep(directory, mmap_mode="r"):
+    """
+    Read a sweep written by :func:`get_hmf` with `output_dir` (see :class:`ColumnarSink`).
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the store.
+
+    mmap_mode : str, optional
+        The mode in which to memory-map the quantity arrays (see :func:`numpy.load`).
+
+    Returns
+    -------
+    params : structured array
+        The varied parameters of each row.
+
+    done : bool array
+        Whether each row has been written.
+
+    columns : dict
+        The array of each stored quantity, with the row as the first axis.
+    """
+    params = np.load(os.path.join(directory, "params.npy"))
+    done = np.load(os.path.join(directory, "done.npy"))
+
+    columns = {}
+    for fname in os.listdir(directory):
+        q, ext = os.path.splitext(fname)
+        if ext == ".npy" and q not in ("params", "done"):
+            columns[q] = np.load(os.path.join(directory, fname), mmap_mode=mmap_mode)
+
+    return params, done, columns
+
+
+def _param_table(combinations):
+    """
+    Build a structured array of the varied parameters in `combinations`, with
+    numerical parameters stored as floats and others as strings.
+    """
+    names = list(combinations[0].keys()) if combinations else []
+    fields = []
+    for k in names:
+        vals = [c[k] for c in combinations]
+        if all(isinstance(v, numbers.Real) and not isinstance(v, bool) for v in vals):
+            fields.append((k, np.array(vals, dtype=float)))
+        else:
+            fields.append((k, np.array([str(v) for v in vals])))
+
+    table = np.zeros(len(combinations), dtype=[(k, v.dtype) for k, v in fields])
+    for k, v in fields:
+        table[k] = v
+    return table
 
 
 def _make_label(d):
@@ -8,7 +8,6 @@ may be implemented.
 '''
 
 import numpy as np
-from scipy import integrate as intg
 from ._framework import Component as Cmpt
 from scipy.interpolate import InterpolatedUnivariateSpline as _spline
 from ._utils import inherit_docstrings as _inherit
@@ -51,7 +50,7 @@ class GrowthFactor(Cmpt):
 
         Parameters
         ----------
-        z : float
+        z : float or array_like
             The redshift
 
         getvec : bool, optional
@@ -62,27 +61,43 @@ class GrowthFactor(Cmpt):
 
         Returns
         -------
-        dplus : float
+        dplus : float or array_like
             The un-normalised growth factor.
         """
+        integral = self._integral_table()
+
+        if getvec:
+            a_upper = 1.0 / (1.0 + z)
+            lna = np.arange(np.log(self.params["amin"]), np.log(a_upper), self.params['dlna'])
+            lna = np.hstack((lna, np.log(a_upper)))
+            self._zvec = 1.0 / np.exp(lna) - 1.0
+            z = self._zvec
+            integ = integral(lna) - integral(lna[0])
+        else:
+            integ = integral(-np.log1p(z)) - integral(np.log(self.params["amin"]))
 
-        a_upper = 1.0 / (1.0 + z)
-
-        lna = np.arange(np.log(self.params["amin"]), np.log(a_upper), self.params['dlna'])
-        lna = np.hstack((lna,np.log(a_upper)))
+        return 5.0 * self.cosmo.Om0 * self.cosmo.efunc(z) * integ / 2.0
 
-        self._zvec = 1.0 / np.exp(lna) - 1.0
+    def _integral_table(self):
+        """
+        The antiderivative (in ln(a)) of the integrand of :math:`D^+(a)`, as a spline.
 
-        integrand = 1.0 / (np.exp(lna) * self.cosmo.efunc(self._zvec)) ** 3
+        The table spans ``amin`` to ``a=1`` and is cached on the instance, so that
+        subsequent redshifts are answered by interpolation. It is re-built if the
+        cosmology or the model parameters change.
+        """
+        key = (self.cosmo, self.params['amin'], self.params['dlna'])
+        cache = self.__dict__.get("_dplus_table")
+        if cache is not None and cache[0][0] is key[0] and cache[0][1:] == key[1:]:
+            return cache[1]
 
-        if not getvec:
-            integral = intg.simps(np.exp(lna) * integrand, x=lna,even="avg")
-            dplus = 5.0 * self.cosmo.Om0 * self.cosmo.efunc(z) * integral / 2.0
-        else:
-            integral = intg.cumtrapz(np.exp(lna) * integrand, x=lna, initial=0.0)
-            dplus = 5.0 * self.cosmo.Om0 * self.cosmo.efunc(self._zvec) * integral / 2.0
+        lna = np.arange(np.log(self.params["amin"]), 0.0, self.params['dlna'])
+        lna = np.hstack((lna, 0.0))
+        integrand = np.exp(lna) / (np.exp(lna) * self.cosmo.efunc(1.0 / np.exp(lna) - 1.0)) ** 3
 
-        return dplus
+        integral = _spline(lna, integrand).antiderivative()
+        self._dplus_table = (key, integral)
+        return integral
 
     def growth_factor(self, z):
         """
@@ -90,12 +105,12 @@ class GrowthFactor(Cmpt):
 
         Parameters
         ----------
-        z : float
+        z : float or array_like
             The redshift
 
         Returns
         -------
-        float
+        float or array_like
             The normalised growth factor.
         """
         growth = self._d_plus(z)/self._d_plus(0.0)
@@ -188,12 +203,12 @@ class GenMFGrowth(GrowthFactor):
         raise NotImplementedError()
 
     def _general_case(self, w, x):
-        x = np.atleast_1d(x)
+        x = np.asarray(x)
         xn_vec = np.linspace(0, x.max(), 1000)
 
-        func = _spline(xn_vec,(xn_vec / (xn_vec ** 3 + 2)) ** 1.5)
+        func = _spline(xn_vec,(xn_vec / (xn_vec ** 3 + 2)) ** 1.5).antiderivative()
 
-        g = np.array([func.integral(0,y) for y in x])
+        g = func(x) - func(0)
         return ((x ** 3.0 + 2.0) ** 0.5) * (g / x ** 1.5)
 
     def growth_factor(self, z):
@@ -213,7 +228,7 @@ class GenMFGrowth(GrowthFactor):
         gf : array_like
             The growth factor at `z`.
         """
-        a = 1 / (1 + z)
+        a = 1 / (1 + np.asarray(z))
         w = 1 / self.cosmo.Om0 - 1.0
         s = 1 - self.cosmo.Ok0
         if (s > 1 or self.cosmo.Om0 < 0 or (s != 1 and self.cosmo.Ode0 > 0)):
@@ -289,7 +304,7 @@ class Carroll1992(GrowthFactor):
         of redshift. Note that the `getvec` argument is not
         used in this function.
         """
-        a = 1 / (1 + z)
+        a = 1 / (1 + np.asarray(z))
 
         om = self.cosmo.Om0/a ** 3
         denom = self.cosmo.Ode0 + om
@@ -8,10 +8,18 @@ been modified to improve its integration with this package.
 """
 import numpy as np
 from scipy.integrate import simps as _simps
-import copy
 from scipy.interpolate import InterpolatedUnivariateSpline as _spline
 from .cosmo import Cosmology as csm
 
+def _lnsigma2(k, delta_k, lnr):
+    """
+    Log of the variance of `delta_k` smoothed with a Gaussian filter, at radii ``exp(lnr)``.
+
+    All radii are evaluated in a single matrix operation.
+    """
+    integrand = delta_k * np.exp(-np.outer(np.exp(lnr), k) ** 2)
+    return np.log(_simps(integrand, np.log(k), axis=-1))
+
 def _get_spec(k, delta_k, sigma_8):
     """
     Calculate nonlinear wavenumber, effective spectral index and curvature
@@ -23,57 +31,74 @@ def _get_spec(k, delta_k, sigma_8):
         Wavenumbers
 
     delta_k : array_like
-        Dimensionless power spectrum at `k`
+        Dimensionless power spectrum at `k`. May be 2D, with one row per redshift.
+        If the rows are proportional to each other (i.e. the same linear spectrum
+        scaled by the growth factor), the smoothed variance is only calculated once,
+        and shifted in amplitude for each row. Otherwise each row is treated separately.
 
     sigma_8 : scalar
         RMS linear density fluctuations in spheres of radius 8 Mpc/h at z=0.
 
     Returns
     -------
-    rknl : float
-        Non-linear wavenumber
+    rknl : array
+        Non-linear wavenumber, one per row of `delta_k`.
 
-    rneff : float
-        Effective spectral index
+    rneff : array
+        Effective spectral index, one per row of `delta_k`.
 
-    rncur : float
-        Curvature of the spectrum
+    rncur : array
+        Curvature of the spectrum, one per row of `delta_k`.
     """
+    delta_k = np.atleast_2d(delta_k)
+    base = delta_k[0]
+
+    if not np.allclose(delta_k / delta_k[:, :1], base / base[0], rtol=1e-8, atol=0):
+        # Eg. scale-dependent growth: there is no single spectrum to shift.
+        specs = [_get_spec(k, row, sigma_8) for row in delta_k]
+        return tuple(np.concatenate(x) for x in zip(*specs))
+
+    shift = np.log(np.sum(delta_k, axis=-1) / np.sum(base))[:, None]
+
     # Initialize sigma spline
     if sigma_8 < 1.0 and sigma_8 > 0.6:
         lnr = np.linspace(np.log(0.1), np.log(10.0), 500)
-        lnsig = np.empty(500)
-
-        for i, r in enumerate(lnr):
-            R = np.exp(r)
-            integrand = delta_k * np.exp(-(k * R) ** 2)
-            sigma2 = _simps(integrand, np.log(k))
-            lnsig[i] = np.log(sigma2)
+        lnr = np.repeat(lnr[None, :], len(delta_k), axis=0)
+        lnsig = _lnsigma2(k, base, lnr[0]) + shift
 
     else:  # # weird sigma_8 means we need a different range of r to go through 0.
-        for r in [0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, 10.0, 100.0, 1000.0]:
-            integrand = delta_k * np.exp(-(k * r) ** 2)
-            sigma2 = _simps(integrand, np.log(k))
-            lnsig1 = np.log(sigma2)
+        rs = np.array([0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, 10.0, 100.0, 1000.0])
+        lnsig_rs = _lnsigma2(k, base, np.log(rs)) + shift
+
+        r = np.empty(len(delta_k))
+        for i, row in enumerate(lnsig_rs):
+            neg = np.where(row < 0)[0]
+            if len(neg) and neg[0] == 0:
+                print("WARNING: LOWEST R NOT LOW ENOUGH IN _GET_SPEC. ln(sig) starts below 0")
+            r[i] = rs[neg[0]] if len(neg) else rs[-1]
+
+        lnr = np.empty((len(delta_k), 250))
+        lnsig = np.empty((len(delta_k), 250))
+        for rr in np.unique(r):
+            idx = r == rr
+            lnr[idx] = np.linspace(np.log(0.1 * rr), np.log(rr), 250)
+            lnsig[idx] = _lnsigma2(k, base, lnr[idx][0]) + shift[idx]
+
+    rknl = np.empty(len(delta_k))
+    rneff = np.empty(len(delta_k))
+    rncur = np.empty(len(delta_k))
+    for i in range(len(delta_k)):
+        rknl[i], rneff[i], rncur[i] = _spec_from_table(k, base, shift[i], lnr[i], lnsig[i])
 
-            if lnsig1 < 0:
-                try:
-                    lnsig1 = lnsig_old
-                except:
-                    print("WARNING: LOWEST R NOT LOW ENOUGH IN _GET_SPEC. ln(sig) starts below 0: ", lnsig1)
-                break
-
-            lnsig_old = copy.copy(lnsig1)
-
-        lnr = np.linspace(np.log(0.1 * r), np.log(r), 250)
-        lnsig = np.empty(250)
+    return rknl, rneff, rncur
 
-        for i, r in enumerate(lnr):
-            R = np.exp(r)
-            integrand = delta_k * np.exp(-(k * R) ** 2)
-            sigma2 = _simps(integrand, np.log(k))
-            lnsig[i] = np.log(sigma2)
+def _spec_from_table(k, delta_k, shift, lnr, lnsig):
+    r"""
+    Find the nonlinear wavenumber, effective index and curvature from a table of
+    the smoothed variance, :math:`\ln \sigma^2(\ln r)`.
 
+    `delta_k` and `shift` are used (as in :func:`_get_spec`) to extend the table if required.
+    """
     r_of_sig = _spline(lnsig[::-1], lnr[::-1], k=5)
     rknl = 1.0 / np.exp(r_of_sig(0.0))
 
@@ -83,13 +108,7 @@ def _get_spec(k, delta_k, sigma_8):
     except Exception as e:
         print("HALOFIT WARNING: Requiring extra iterations to find derivatives of sigma at 1/rknl (this often happens at high redshift).")
         lnr = np.linspace(np.log(0.2 / rknl), np.log(5 / rknl), 100)
-        lnsig = np.empty(100)
-
-        for i, r in enumerate(lnr):
-            R = np.exp(r)
-            integrand = delta_k * np.exp(-(k * R) ** 2)
-            sigma2 = _simps(integrand, np.log(k))
-            lnsig[i] = np.log(sigma2)
+        lnsig = _lnsigma2(k, delta_k, lnr) + shift
         lnr = lnr[np.logical_not(np.isinf(lnsig))]
         lnsig = lnsig[np.logical_not(np.isinf(lnsig))]
         if len(lnr) < 2:
@@ -113,13 +132,14 @@ def halofit(k, delta_k,sigma_8, z, cosmo = None, takahashi=True):
         Wavenumbers [h/Mpc].
 
     delta_k : array_like
-        Dimensionless power (linear) at `k`.
+        Dimensionless power (linear) at `k`. If `z` is an array, this must be
+        2D, with one row per redshift.
 
     sigma_8 : float
         RMS linear density fluctuations in spheres of radius 8 Mpc/h at z=0.
 
-    z : float
-        Redshift
+    z : float or array_like
+        Redshift(s).
 
     cosmo : :class:`hmf.cosmo.Cosmology` instance, optional
         An instance of either the `Cosmology` class provided in the `hmf` package, or
@@ -133,25 +153,38 @@ def halofit(k, delta_k,sigma_8, z, cosmo = None, takahashi=True):
     Returns
     -------
     nonlinear_delta_k : array_like
-        Dimensionless power at `k`, with nonlinear corrections applied.
+        Dimensionless power at `k`, with nonlinear corrections applied. If `z` is
+        an array, this has shape ``(len(z), len(k))``.
+
+    Notes
+    -----
+    For an array of redshifts, the rows of `delta_k` are assumed to differ only
+    by the growth factor, so that the smoothed variance used to find the nonlinear
+    scale is calculated only once.
     """
     if cosmo is None:
         cosmo = csm()
 
-    # Get physical parameters
-    rknl, neff, rncur = _get_spec(k, delta_k, sigma_8)
+    if np.ndim(z) and np.shape(delta_k) != (len(z), len(k)):
+        raise ValueError("delta_k must have shape (len(z), len(k)) for an array of redshifts")
+
+    delta_k = np.atleast_2d(delta_k)
+
+    # Get physical parameters, with redshift along the first axis
+    rknl, neff, rncur = [x[:, None] for x in _get_spec(k, delta_k, sigma_8)]
 
     # Only apply the model to higher wavenumbers
     mask = k > 0.005
-    plin = delta_k[mask]
+    plin = delta_k[:, mask]
     k = k[mask]
 
 
     # Define the cosmology at redshift
-    omegamz = cosmo.Om(z)
-    omegavz = cosmo.Ode(z)
+    zcol = np.atleast_1d(z)[:, None]
+    omegamz = cosmo.Om(zcol)
+    omegavz = cosmo.Ode(zcol)
 
-    w = cosmo.w(z)
+    w = cosmo.w(zcol)
     fnu = cosmo.Onu0 / cosmo.Om0
 
 
@@ -185,24 +218,28 @@ def halofit(k, delta_k,sigma_8, z, cosmo = None, takahashi=True):
         xnu = 10 ** (0.9589 + 1.2857 * neff)
 
 
-    if np.abs(1 - omegamz) > 0.01:
-        f1a = omegamz ** -0.0732
-        f2a = omegamz ** -0.1423
-        f3a = omegamz ** 0.0725
-        f1b = omegamz ** -0.0307
-        f2b = omegamz ** -0.0585
-        f3b = omegamz ** 0.0743
-        frac = omegavz / (1 - omegamz)
-        if takahashi:
-            f1 = f1b
-            f2 = f2b
-            f3 = f3b
-        else:
-            f1 = frac * f1b + (1 - frac) * f1a
-            f2 = frac * f2b + (1 - frac) * f2a
-            f3 = frac * f3b + (1 - frac) * f3a
+    f1a = omegamz ** -0.0732
+    f2a = omegamz ** -0.1423
+    f3a = omegamz ** 0.0725
+    f1b = omegamz ** -0.0307
+    f2b = omegamz ** -0.0585
+    f3b = omegamz ** 0.0743
+    if takahashi:
+        f1 = f1b
+        f2 = f2b
+        f3 = f3b
     else:
-        f1 = f2 = f3 = 1.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frac = omegavz / (1 - omegamz)
+        f1 = frac * f1b + (1 - frac) * f1a
+        f2 = frac * f2b + (1 - frac) * f2a
+        f3 = frac * f3b + (1 - frac) * f3a
+
+    # Close to Einstein-de Sitter, no correction is applied
+    eds = np.abs(1 - omegamz) <= 0.01
+    f1 = np.where(eds, 1.0, f1)
+    f2 = np.where(eds, 1.0, f2)
+    f3 = np.where(eds, 1.0, f3)
 
     y = k / rknl
 
@@ -215,6 +252,8 @@ def halofit(k, delta_k,sigma_8, z, cosmo = None, takahashi=True):
 
     # We have to copy so the original data is not overwritten, giving unexpected results.
     nonlinear_delta_k = delta_k.copy()
-    nonlinear_delta_k[mask] = pnl
+    nonlinear_delta_k[:, mask] = pnl
 
-    return nonlinear_delta_k
+    if np.ndim(z):
+        return nonlinear_delta_k
+    return nonlinear_delta_k[0]
@@ -9,7 +9,6 @@ functionality of :mod:`hmf` in an easy-to-use way.
 # Some Imports
 ###############################################################################
 import numpy as np
-import copy
 import logging
 from . import fitting_functions as ff
 from . import transfer
@@ -18,7 +17,7 @@ from .integrate_hmf import hmf_integral_gtm as int_gtm
 from numpy import issubclass_
 logger = logging.getLogger('hmf')
 from .filters import TopHat, Filter
-from ._framework import get_model
+from ._framework import get_model, get_model_
 from scipy.optimize import minimize
 from scipy.interpolate import InterpolatedUnivariateSpline as spline
 import warnings
@@ -61,6 +60,14 @@ class MassFunction(transfer.Transfer):
 
     >>> h.update(z=2)
     >>> h.dndm
+
+    Several redshifts may be evaluated at once by passing an array for `z`. The
+    redshift-independent parts of the calculation are then shared, and mass-dependent
+    quantities gain a leading redshift axis:
+
+    >>> h = MassFunction(z=[0, 1, 2])
+    >>> h.dndm.shape
+    (3, 500)
     """
 
 
@@ -251,6 +258,15 @@ class MassFunction(transfer.Transfer):
 
 
     #--------------------------------  PROPERTIES ------------------------------
+    @cached_quantity
+    def _z_column(self):
+        """
+        Redshift(s), shaped to broadcast against mass-dependent quantities.
+        """
+        if np.ndim(self.z):
+            return self.z[:, None]
+        return self.z
+
     @cached_quantity
     def mean_density(self):
         """
@@ -263,16 +279,22 @@ class MassFunction(transfer.Transfer):
         """
         Instantiated model for the hmf fitting function.
         """
+        return self._get_hmf(self.m, self.nu, self.n_eff)
+
+    def _get_hmf(self, m, nu, n_eff):
+        """
+        Instantiate the hmf fitting function at arbitrary masses, given `nu` and `n_eff` there.
+        """
         if issubclass_(self.hmf_model, ff.FittingFunction):
-            return self.hmf_model(m=self.m, nu2=self.nu, z=self.z,
-                              delta_halo=self.delta_halo, omegam_z=self.cosmo.Om(self.z),
-                              delta_c=self.delta_c, n_eff=self.n_eff,
+            return self.hmf_model(m=m, nu2=nu, z=self._z_column,
+                              delta_halo=self.delta_halo, omegam_z=self.cosmo.Om(self._z_column),
+                              delta_c=self.delta_c, n_eff=n_eff,
                               ** self.hmf_params)
         elif isinstance(self.hmf_model, str):
             return get_model(self.hmf_model, "hmf.fitting_functions",
-                            m=self.m, nu2=self.nu, z=self.z,
-                            delta_halo=self.delta_halo, omegam_z=self.cosmo.Om(self.z),
-                            delta_c=self.delta_c, n_eff=self.n_eff,
+                            m=m, nu2=nu, z=self._z_column,
+                            delta_halo=self.delta_halo, omegam_z=self.cosmo.Om(self._z_column),
+                            delta_c=self.delta_c, n_eff=n_eff,
                             ** self.hmf_params)
 
     @cached_quantity
@@ -303,14 +325,21 @@ class MassFunction(transfer.Transfer):
             return self.delta_h
 
         elif self.delta_wrt == 'crit':
-            return self.delta_h / self.cosmo.Om(self.z)
+            return self.delta_h / self.cosmo.Om(self._z_column)
+
+    @cached_quantity
+    def _unn_sigma_and_derivative(self):
+        """
+        Unnormalised mass variance at z=0, and its logarithmic derivative with radius
+        """
+        return self.filter.sigma_and_derivative(self.radii)
 
     @cached_quantity
     def _unn_sigma0(self):
         """
         Unnormalised mass variance at z=0
         """
-        return self.filter.sigma(self.radii)
+        return self._unn_sigma_and_derivative[0]
 
     @cached_quantity
     def _sigma_0(self):
@@ -337,13 +366,18 @@ class MassFunction(transfer.Transfer):
         .. math:: frac{d\ln\sigma}{d\ln m} = \frac{3}{2\sigma^2\pi^2R^4}\int_0^\infty \frac{dW^2(kR)}{dM}\frac{P(k)}{k^2}dk
 
         """
-        return 0.5 * self.filter.dlnss_dlnm(self.radii)
+        return 0.5 * self._unn_sigma_and_derivative[1] * self.filter.dlnr_dlnm(self.radii)
 
     @cached_quantity
     def sigma(self):
         """
         The mass variance at `z`, ``len=len(m)``
+
+        If :attr:`z` is an array, this (and all quantities derived from it) has
+        shape ``(len(z), len(m))``.
         """
+        if np.ndim(self.z):
+            return np.outer(self.growth_factor, self._sigma_0)
         return self._sigma_0 * self.growth_factor
 
     @cached_quantity
@@ -356,16 +390,24 @@ class MassFunction(transfer.Transfer):
     @cached_quantity
     def mass_nonlinear(self):
         """
-        The nonlinear mass, nu(Mstar) = 1.
+        The nonlinear mass, nu(Mstar) = 1. ``len=len(z)`` if :attr:`z` is an array.
         """
-        if self.nu.min() >1 or self.nu.max()<1:
+        if np.ndim(self.z):
+            return np.array([self._mass_nonlinear(nu, g) for nu, g in zip(self.nu, self.growth_factor)])
+        return self._mass_nonlinear(self.nu, self.growth_factor)
+
+    def _mass_nonlinear(self, nu, growth_factor):
+        """
+        Find the nonlinear mass for a single redshift, given `nu` and the growth factor there.
+        """
+        if nu.min() >1 or nu.max()<1:
             warnings.warn("Nonlinear mass outside mass range")
-            if self.nu.min() > 1:
+            if nu.min() > 1:
                 startr = np.log(self.radii.min())
             else:
                 startr = np.log(self.radii.max())
 
-            model = lambda lnr : (self.filter.sigma(np.exp(lnr))*self._normalisation * self.growth_factor
+            model = lambda lnr : (self.filter.sigma(np.exp(lnr))*self._normalisation * growth_factor
                                   - self.delta_c)**2
 
             res = minimize(model,[startr,])
@@ -377,7 +419,7 @@ class MassFunction(transfer.Transfer):
                 warnings.warn("Minimization failed :(")
                 return 0
         else:
-            nu = spline(self.nu,self.m,k=5)
+            nu = spline(nu,self.m,k=5)
             return nu(1)
 
     @cached_quantity
@@ -419,7 +461,7 @@ class MassFunction(transfer.Transfer):
         dndm = self.fsigma * self.mean_density0 * np.abs(self._dlnsdlnm) / self.m ** 2
         if isinstance(self.hmf, ff.Behroozi):
             ngtm_tinker = self._gtm(dndm)
-            dndm = self.hmf._modify_dndm(self.m, dndm, self.z, ngtm_tinker)
+            dndm = self.hmf._modify_dndm(self.m, dndm, self._z_column, ngtm_tinker)
 
         # else:  # #This is for a survey-volume weighted calculation
         #     raise NotImplementedError()
@@ -463,7 +505,7 @@ class MassFunction(transfer.Transfer):
         """
         return self.m * self.dndm * np.log(10)
 
-    def _gtm(self, dndm, mass_density=False):
+    def _gtm(self, dndm, mass_density=False, extend=True):
         """
         Calculate number or mass density above mass thresholds in `m`
 
@@ -475,25 +517,85 @@ class MassFunction(transfer.Transfer):
         ----------
         dndm : array_like, ``len(self.m)``
             Should usually just be exactly :attr:`dndm`, except in Behroozi fit.
+            May be 2D, with a leading redshift axis.
 
         mass_density : bool, ``False``
             Whether to get the mass density, or number density.
+
+        extend : bool, ``True``
+            Whether to extend the mass range (with :attr:`hmf_model`) if required.
         """
         # Get required local variables
-        size = len(dndm)
+        size = dndm.shape[-1]
         m = self.m
+        dndms = np.atleast_2d(dndm)
+
         # If the highest mass is very low, we try calculating it to higher masses
         # The dlog10m is NOT CHANGED, so the input needs to be finely spaced.
         # If the top value of dndm is NaN, don't try calculating higher masses.
-        if m[-1] < 10 ** 16.5 and not np.isnan(dndm[-1]) and not dndm[-1]==0:
-            # ff.Behroozi function won't work here.
-            if not isinstance(self.hmf, ff.Behroozi):
-                new_mf = copy.deepcopy(self)
-                new_mf.update(Mmin=np.log10(self.m[-1]) + self.dlog10m, Mmax=18)
-                dndm = np.concatenate((dndm, new_mf.dndm))
+        # ff.Behroozi function won't work here.
+        extend = np.logical_not(np.logical_or(np.isnan(dndms[:, -1]), dndms[:, -1] == 0)) & extend
+        if m[-1] < 10 ** 16.5 and np.any(extend) and not isinstance(self.hmf, ff.Behroozi):
+            new_m, new_dndm = self._dndm_extension
+            m_ext = np.concatenate((m, new_m))
+            dndm_ext = np.concatenate((dndms, np.atleast_2d(new_dndm)), axis=-1)
+        else:
+            extend[:] = False
+
+        ngtm = np.empty(dndms.shape)
+        for i, row in enumerate(dndms):
+            if extend[i]:
+                ngtm[i] = self._gtm_single(m_ext, dndm_ext[i], mass_density)[:size]
+            else:
+                ngtm[i] = self._gtm_single(m, row, mass_density)[:size]
+
+        return ngtm.reshape(dndm.shape)
+
+    @cached_quantity
+    def _dndm_extension(self):
+        """
+        Masses above `m` (up to :math:`10^{18}`) and ``dndm`` there, for use in cumulative integrals.
+        """
+        m = 10 ** np.arange(np.log10(self.m[-1]) + self.dlog10m, 18, self.dlog10m)
+        return m, self._dndm_at(m)
+
+    def _dndm_at(self, m):
+        """
+        Calculate ``dndm`` at arbitrary masses `m`.
+
+        This re-uses the instantiated filter, normalised power spectrum and growth
+        factor, so only the mass-dependent parts of the calculation are performed.
+        It is used to extend the mass range for cumulative integrals.
+        """
+        radii = self.filter.mass_to_radius(m, self.mean_density0)
+        unn_sigma, dlnss_dlnr = self.filter.sigma_and_derivative(radii)
+        sigma_0 = self._normalisation * unn_sigma
+        dlnsdlnm = 0.5 * dlnss_dlnr * self.filter.dlnr_dlnm(radii)
+
+        if np.ndim(self.z):
+            sigma = np.outer(self.growth_factor, sigma_0)
+        else:
+            sigma = sigma_0 * self.growth_factor
+
+        nu = (self.delta_c / sigma) ** 2
+        n_eff = -3.0 * (2.0 * dlnsdlnm + 1.0)
+
+        fsigma = self._get_hmf(m, nu, n_eff).fsigma
+        return fsigma * self.mean_density0 * np.abs(dlnsdlnm) / m ** 2
 
-                m = np.concatenate((m, new_mf.m))
+    def _alter(self, m, dndm):
+        """
+        Hook for subclasses which modify ``dndm`` after the fitting function is applied.
 
+        Used by :meth:`evaluate_models`, which bypasses :attr:`dndm`. Returns `dndm` unchanged.
+        """
+        return dndm
+
+    @staticmethod
+    def _gtm_single(m, dndm, mass_density):
+        """
+        Integrate a single (1D) `dndm` above each mass in `m`.
+        """
         ngtm = int_gtm(m[dndm>0], dndm[dndm>0], mass_density)
 
         # We need to set ngtm back in the original length vector with nans where they were originally
@@ -503,8 +605,7 @@ class MassFunction(transfer.Transfer):
             ngtm_temp[dndm>0] = ngtm
             ngtm = ngtm_temp
 
-        # Since ngtm may have been extended, we cut it back
-        return ngtm[:size]
+        return ngtm
 
     @cached_quantity
     def ngtm(self):
@@ -563,3 +664,231 @@ class MassFunction(transfer.Transfer):
         Size of simulation volume in which to expect one halo of mass m (with 95% probability), ``len=len(m)`` [units :math:`Mpch^{-1}`]
         """
         return (0.366362 / self.ngtm) ** (1. / 3.)
+
+    #--------------------------------  BATCHED EVALUATION ---------------------
+    _grid_quantities = ["sigma", "lnsigma", "nu", "n_eff", "fsigma", "dndm", "dndlnm", "dndlog10m"]
+
+    def evaluate_grid(self, params_table, quantities=("dndm",), chunk_size=None):
+        r"""
+        Evaluate mass-dependent quantities over a table of parameters, in batches.
+
+        Rather than updating the framework for every combination of parameters,
+        this stacks the mass variances and fitting functions of many parameter
+        combinations along a leading axis, so that they are evaluated in a handful of
+        array operations. The transfer function is only re-calculated once for each
+        distinct cosmology in the table, and the mass variance once for each distinct
+        cosmology and spectral index.
+
+        All parameters not present in `params_table` are taken from the current
+        state of the instance, which is not modified.
+
+        Subclasses which modify the power spectrum or mass function (eg.
+        :class:`hmf.wdm.MassFunctionWDM`) are not supported.
+
+        Parameters
+        ----------
+        params_table : dict or structured array
+            Columns of parameter values, all of the same length. Allowed column names are
+            ``sigma_8``, ``n`` and ``z``, and any parameter accepted in :attr:`cosmo_params`
+            (eg. ``Om0``, ``H0``).
+
+        quantities : list of str, optional
+            The quantities to return. Must be a subset of ``sigma``, ``lnsigma``, ``nu``,
+            ``n_eff``, ``fsigma``, ``dndm``, ``dndlnm`` and ``dndlog10m``.
+
+        chunk_size : int, optional
+            Number of parameter combinations evaluated simultaneously. By default, this
+            is chosen such that the largest temporary array is ~32 MB.
+
+        Returns
+        -------
+        dict
+            A dictionary with an array of shape ``(len(params_table), len(m))`` for each
+            of `quantities`.
+
+        Examples
+        --------
+        >>> h = MassFunction(transfer_model="EH")
+        >>> out = h.evaluate_grid({"sigma_8":[0.7, 0.8, 0.9], "Om0":[0.3, 0.3, 0.31]})
+        >>> out['dndm'].shape
+        (3, 500)
+        """
+        if isinstance(quantities, str):
+            quantities = [quantities]
+        for q in quantities:
+            if q not in self._grid_quantities:
+                raise ValueError("%s cannot be evaluated on a grid. Use one of %s" % (q, self._grid_quantities))
+
+        if issubclass_(self.hmf_model, ff.Behroozi) or self.hmf_model == "Behroozi":
+            raise ValueError("The Behroozi fit cannot be evaluated on a grid")
+
+        # The grid re-implements these quantities, so subclasses modifying them are not supported.
+        for q in ["_unnormalised_lnT", "_unnormalised_power", "sigma", "fsigma", "dndm"]:
+            if getattr(self.__class__, q) is not getattr(MassFunction, q):
+                raise ValueError("%s cannot be evaluated on a grid, as it modifies %s" % (self.__class__.__name__, q))
+
+        # Gather the table into a dict of equal-length columns
+        if hasattr(params_table, "dtype") and params_table.dtype.names:
+            params_table = {name: params_table[name] for name in params_table.dtype.names}
+        columns = {k: np.atleast_1d(np.asarray(v, dtype=float)) for k, v in params_table.items()}
+
+        nrows = set(len(v) for v in columns.values())
+        if len(nrows) != 1:
+            raise ValueError("All columns of params_table must be the same length")
+        nrows = nrows.pop()
+
+        cosmo_keys = [k for k in columns if k not in ["sigma_8", "n", "z"]]
+        for k in cosmo_keys:
+            if k in self.get_all_parameter_names():
+                raise ValueError("%s cannot be evaluated on a grid" % k)
+
+        if "z" not in columns and np.ndim(self.z):
+            raise ValueError("z must be scalar, or be a column of params_table")
+
+        sigma_8 = columns.get("sigma_8", np.repeat(self.sigma_8, nrows))
+        n = columns.get("n", np.repeat(self.n, nrows))
+        z = columns.get("z", np.repeat(self.z, nrows))
+        if np.any(z < 0):
+            raise ValueError("z must be > 0")
+
+        hmf_model = self.hmf_model
+        if isinstance(hmf_model, str):
+            hmf_model = get_model_(hmf_model, "hmf.fitting_functions")
+        filter_model = self.filter_model
+        if isinstance(filter_model, str):
+            filter_model = get_model_(filter_model, "hmf.filters")
+
+        out = {q: np.empty((nrows, len(self.m))) for q in quantities}
+
+        # Group rows by cosmology and spectral index: the unnormalised mass variance depends
+        # only on these, and is scaled by the normalisation and growth factor for each row.
+        groups = {}
+        for i in range(nrows):
+            groups.setdefault(tuple(columns[k][i] for k in cosmo_keys), {}).setdefault(n[i], []).append(i)
+
+        # Use a separate instance if the cosmology changes, so this one is untouched.
+        if cosmo_keys:
+            worker = self.fork()
+        else:
+            worker = self
+
+        if chunk_size is None:
+            chunk = max(1, 2 ** 22 // len(self.m))
+        else:
+            chunk = chunk_size
+
+        for cosmo_vals, n_groups in groups.items():
+            if cosmo_keys:
+                worker.update(cosmo_params=dict(zip(cosmo_keys, cosmo_vals)))
+
+            k = worker.k
+            t2 = np.exp(worker._unnormalised_lnT) ** 2
+            radii = worker.radii
+            m = worker.m
+
+            for n_val, rows in n_groups.items():
+                filt = filter_model(k, k ** n_val * t2, **self.filter_params)
+                unn_sigma, dlnss_dlnr = filt.sigma_and_derivative(radii)
+                dlnsdlnm = 0.5 * dlnss_dlnr * filt.dlnr_dlnm(radii)
+                unn_sig8 = worker._get_unn_sig8(n_val)
+
+                for start in range(0, len(rows), chunk):
+                    idx = np.array(rows[start:start + chunk])
+                    zcol = z[idx][:, None]
+
+                    norm = sigma_8[idx] / unn_sig8
+                    growth = worker.growth.growth_factor(z[idx])
+                    sigma = (norm * growth)[:, None] * unn_sigma
+
+                    if self.delta_wrt == "mean":
+                        delta_halo = self.delta_h
+                    else:
+                        delta_halo = self.delta_h / worker.cosmo.Om(zcol)
+
+                    n_eff = np.broadcast_to(-3.0 * (2.0 * dlnsdlnm + 1.0), sigma.shape)
+                    results = {"sigma": sigma,
+                               "lnsigma": np.log(1 / sigma),
+                               "nu": (self.delta_c / sigma) ** 2,
+                               "n_eff": n_eff}
+
+                    if set(quantities).intersection(["fsigma", "dndm", "dndlnm", "dndlog10m"]):
+                        fsigma = hmf_model(m=m, nu2=results['nu'], z=zcol, delta_halo=delta_halo,
+                                           omegam_z=worker.cosmo.Om(zcol), delta_c=self.delta_c,
+                                           n_eff=n_eff, **self.hmf_params).fsigma
+                        dndm = fsigma * worker.mean_density0 * np.abs(dlnsdlnm) / m ** 2
+                        results.update(fsigma=fsigma, dndm=dndm, dndlnm=m * dndm,
+                                       dndlog10m=m * dndm * np.log(10))
+
+                    for q in quantities:
+                        out[q][idx] = results[q]
+
+        return out
+
+
+    def evaluate_models(self, models, quantities=("fsigma", "dndm"), model_params=None):
+        r"""
+        Evaluate several fitting functions for the current state of the instance.
+
+        The mass variance, effective spectral index and other inputs to the fitting
+        function are calculated once and shared by all models, without modifying
+        :attr:`hmf_model` (and so without invalidating any cached quantities).
+        Subclasses which modify ``dndm`` do so through :meth:`_alter`, which is applied
+        to the ``dndm`` of each model.
+
+        Parameters
+        ----------
+        models : list of str or :class:`hmf.fitting_functions.FittingFunction` subclasses
+            The fitting functions to evaluate.
+
+        quantities : list of str, optional
+            The quantities to return. Must be a subset of ``fsigma``, ``dndm``, ``dndlnm``
+            and ``dndlog10m``.
+
+        model_params : dict, optional
+            Parameters for each model, keyed by model name. Models not present use their
+            defaults, except :attr:`hmf_model` itself, which uses :attr:`hmf_params`.
+
+        Returns
+        -------
+        dict
+            For each model name, a dictionary of the requested quantities, each with the
+            same shape as :attr:`m` (or ``(len(z), len(m))`` for an array `z`).
+
+        Examples
+        --------
+        >>> h = MassFunction(transfer_model="EH")
+        >>> out = h.evaluate_models(["PS", "ST", "Tinker08"])
+        >>> out['PS']['dndm'] / out['ST']['dndm']
+        """
+        if isinstance(quantities, str):
+            quantities = [quantities]
+        for q in quantities:
+            if q not in ["fsigma", "dndm", "dndlnm", "dndlog10m"]:
+                raise ValueError("%s cannot be evaluated for several models" % q)
+
+        model_params = model_params or {}
+        current = self.hmf_model if isinstance(self.hmf_model, str) else self.hmf_model.__name__
+
+        shared = dict(m=self.m, nu2=self.nu, z=self._z_column, delta_halo=self.delta_halo,
+                      omegam_z=self.cosmo.Om(self._z_column), delta_c=self.delta_c, n_eff=self.n_eff)
+        dndm_factor = self.mean_density0 * np.abs(self._dlnsdlnm) / self.m ** 2
+
+        out = {}
+        for model in models:
+            name = model if isinstance(model, str) else model.__name__
+            if isinstance(model, str):
+                model = get_model_(model, "hmf.fitting_functions")
+            params = model_params.get(name, self.hmf_params if name == current else {})
+
+            fit = model(**dict(shared, **params))
+            fsigma = fit.fsigma
+            dndm = fsigma * dndm_factor
+            if isinstance(fit, ff.Behroozi):
+                dndm = fit._modify_dndm(self.m, dndm, self._z_column, self._gtm(dndm, extend=False))
+            dndm = self._alter(self.m, dndm)
+
+            results = {"fsigma": fsigma, "dndm": dndm,
+                       "dndlnm": self.m * dndm, "dndlog10m": self.m * dndm * np.log(10)}
+            out[name] = dict((q, results[q]) for q in quantities)
+
+        return out
@@ -175,10 +175,24 @@ class Transfer(cosmo.Cosmology):
         """
         Redshift.
 
-        Must be greater than 0.
+        Must be greater than 0. May also be a 1D array of redshifts, in which case
+        all redshift-dependent quantities gain a leading axis of length ``len(z)``.
 
-        :type: float
+        :type: float or array_like
         """
+        if np.ndim(val):
+            try:
+                val = np.asarray(val, dtype=float)
+            except ValueError:
+                raise ValueError("z must be a number or array of numbers (", val, ")")
+
+            if val.ndim != 1:
+                raise ValueError("z must be a scalar or 1D array (", val, ")")
+            if np.any(val < 0):
+                raise ValueError("z must be > 0 (", val, ")")
+
+            return val
+
         try:
             val = float(val)
         except ValueError:
@@ -238,6 +252,25 @@ class Transfer(cosmo.Cosmology):
 
         return filt.sigma(8.0)[0]
 
+    def _get_unn_sig8(self, n):
+        """
+        The un-normalised value of sigma_8, for an array of spectral indices `n`.
+
+        This is used by :meth:`hmf.hmf.MassFunction.evaluate_grid`, and does not support
+        subclasses which modify :attr:`_unnormalised_power`.
+        """
+        n = np.asarray(n, dtype=float)[..., None]
+
+        if self.lnk_min > -15 or self.lnk_max < 9:
+            lnk = np.arange(-8, 8, self.dlnk)
+            lnt = self.transfer.lnt(lnk)
+        else:
+            lnk = np.log(self.k)
+            lnt = self._unnormalised_lnT
+        p = np.exp(lnk) ** n * np.exp(lnt) ** 2
+
+        return filters.TopHat(np.exp(lnk), p).sigma(8.0)[..., 0]
+
     @cached_quantity
     def _normalisation(self):
         # Calculate the normalization factor
@@ -269,7 +302,7 @@ class Transfer(cosmo.Cosmology):
     @cached_quantity
     def growth_factor(self):
         r"""
-        The growth factor
+        The growth factor, ``len=len(z)`` if :attr:`z` is an array.
         """
         return self.growth.growth_factor(self.z)
 
@@ -277,7 +310,11 @@ class Transfer(cosmo.Cosmology):
     def power(self):
         """
         Normalised log power spectrum [units :math:`Mpc^3/h^3`]
+
+        If :attr:`z` is an array, this has shape ``(len(z), len(k))``.
         """
+        if np.ndim(self.z):
+            return np.outer(self.growth_factor ** 2, self._power0)
         return self.growth_factor ** 2 * self._power0
 
     @cached_quantity
@@ -292,7 +329,8 @@ class Transfer(cosmo.Cosmology):
         """
         Non-linear log power [units :math:`Mpc^3/h^3`]
 
-        Non-linear corrections come from HALOFIT.
+        Non-linear corrections come from HALOFIT. If :attr:`z` is an array, this
+        has shape ``(len(z), len(k))``.
         """
         return self.k ** -3 * self.nonlinear_delta_k * (2 * np.pi ** 2)
 
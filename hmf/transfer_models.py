@@ -4,9 +4,17 @@ Various models for computing the transfer function.
 Note that these are not transfer function "frameworks". The framework is found
 in :mod:`hmf.transfer`.
 '''
+import collections
+import ctypes
+import hashlib
+import numbers
+import os
+import warnings
 import numpy as np
 from scipy.interpolate import InterpolatedUnivariateSpline as spline
 from ._framework import Component
+from ._cache import _hash_value
+from ._utils import atomic_write
 
 try:
     import camb
@@ -16,6 +24,10 @@ except ImportError as e:
 
 _allfits = ["CAMB", "FromFile", "EH_BAO", "EH_NoBAO", "BBKS", "BondEfs"]
 
+#: Maximum number of parsed transfer tables kept in memory by :class:`FromFile`.
+TABLE_CACHE_SIZE = 16
+_table_cache = collections.OrderedDict()
+
 
 class TransferComponent(Component):
     """
@@ -74,9 +86,52 @@ class FromFile(TransferComponent):
 
         :fname: str
             Location of the file to import.
+
+    Notes
+    -----
+    Parsed files are cached for the lifetime of the process (the most recently
+    used :data:`TABLE_CACHE_SIZE` of them), keyed on their path, modification
+    time and size, so that re-instantiating this model is cheap. The splines extended
+    to low k (below the first tabulated k) are cached along with them. If a binary
+    sidecar file ``fname + ".npy"`` (as written by ``np.save(fname + ".npy", np.genfromtxt(fname))``)
+    exists and is at least as new as `fname`, it is memory-mapped instead of parsing
+    the ASCII file.
     """
     _defaults = {"fname":""}
 
+    @staticmethod
+    def _load_table(fname):
+        """
+        Return the log transfer table, ``(lnk, lnT)``, in `fname`, its spline, and a dict
+        of splines extended to low k (see :meth:`_extended_spline`).
+
+        Tables are cached in a process-wide LRU cache.
+        """
+        stat = os.stat(fname)
+        key = (os.path.abspath(fname), stat.st_mtime, stat.st_size)
+
+        if key in _table_cache:
+            _table_cache[key] = _table_cache.pop(key)
+            return _table_cache[key]
+
+        sidecar = fname + ".npy"
+        if os.path.exists(sidecar) and os.stat(sidecar).st_mtime >= stat.st_mtime:
+            data = np.load(sidecar, mmap_mode="r")
+        else:
+            data = np.genfromtxt(fname)
+
+        try:
+            T = np.log(data[:, [0, 6]].T)
+        except IndexError:
+            T = np.log(data[:, [0, 1]].T)
+
+        T.flags.writeable = False
+        _table_cache[key] = (T, spline(T[0], T[1], k=1), collections.OrderedDict())
+        while len(_table_cache) > TABLE_CACHE_SIZE:
+            _table_cache.popitem(last=False)
+
+        return _table_cache[key]
+
     def _check_low_k(self, lnk, lnT, lnkmin):
         """
         Check convergence of transfer function at low k.
@@ -118,17 +173,64 @@ class FromFile(TransferComponent):
         lnt : array_like
             The log of the transfer function at lnk.
         """
-        try:
-            T = np.log(np.genfromtxt(self.params["fname"])[:, [0, 6]].T)
-        except IndexError:
-            T = np.log(np.genfromtxt(self.params["fname"])[:, [0, 1]].T)
+        T, fnc, extended = self._load_table(self.params["fname"])
 
         if lnk[0] < T[0, 0]:
-            lnkout, lnT = self._check_low_k(T[0, :], T[1, :], lnk[0])
+            fnc = self._extended_spline(T, extended, lnk[0])
+        return fnc(lnk)
+
+    def _extended_spline(self, T, extended, lnkmin):
+        """
+        The spline of the table `T` extended down to `lnkmin`, memoised in `extended`
+        (the most recently used :data:`TABLE_CACHE_SIZE` for each table).
+        """
+        if lnkmin in extended:
+            extended[lnkmin] = extended.pop(lnkmin)
         else:
-            lnkout = T[0, :]
-            lnT = T[1, :]
-        return spline(lnkout, lnT, k=1)(lnk)
+            lnkout, lnT = self._check_low_k(T[0, :].copy(), T[1, :], lnkmin)
+            extended[lnkmin] = spline(lnkout, lnT, k=1)
+            while len(extended) > TABLE_CACHE_SIZE:
+                extended.popitem(last=False)
+        return extended[lnkmin]
+
+
+#: The settings of ``CAMBparams`` (as dotted attribute paths) which key the results of
+#: :class:`CAMB`, besides the cosmology. Settings not listed here are not part of the key.
+CAMB_FINGERPRINT_FIELDS = (
+    "H0", "ombh2", "omch2", "omk", "omnuh2", "TCMB", "YHe",
+    "num_nu_massless", "num_nu_massive", "nu_mass_eigenstates", "nu_mass_degeneracies",
+    "nu_mass_fractions", "nu_mass_numbers", "share_delta_neff", "MassiveNuMethod",
+    "WantTransfer", "Transfer.high_precision", "Transfer.accurate_massive_neutrinos",
+    "Transfer.kmax", "Transfer.k_per_logint", "Transfer.PK_num_redshifts", "Transfer.PK_redshifts",
+    "Accuracy.AccuracyBoost", "Accuracy.lAccuracyBoost", "Accuracy.TransferkBoost",
+    "Accuracy.IntTolBoost", "Accuracy.BackgroundTimeStepBoost",
+    "DarkEnergy", "DarkEnergy.w", "DarkEnergy.wa", "DarkEnergy.cs2",
+    "Recomb", "Reion", "Reion.Reionization", "Reion.use_optical_depth", "Reion.optical_depth",
+    "Reion.redshift", "Reion.delta_redshift", "Reion.fraction",
+)
+
+
+def _camb_fields(camb_params):
+    """
+    The values of the settings :data:`CAMB_FINGERPRINT_FIELDS` of `camb_params`.
+
+    Settings missing from the installed version of CAMB are None, arrays are read as
+    arrays, and sub-models (eg. ``DarkEnergy``) are represented by their class.
+    """
+    out = {}
+    for path in CAMB_FINGERPRINT_FIELDS:
+        val = camb_params
+        for name in path.split("."):
+            val = getattr(val, name, None)
+
+        if isinstance(val, bytes):
+            val = val.decode()
+        elif isinstance(val, (list, tuple, np.ndarray, ctypes.Array)):
+            val = np.array(list(val))
+        elif val is not None and not isinstance(val, (numbers.Number, str)):
+            val = type(val)
+        out[path] = val
+    return out
 
 
 class CAMB(FromFile):
@@ -145,8 +247,18 @@ class CAMB(FromFile):
 
         **camb_params:** An instantiated ``CAMBparams`` object, pre-set with desired accuracy options etc.
 
+        **cache_dir:** Optional directory in which to store computed transfer functions, keyed on a
+        fingerprint of the cosmology and ``camb_params``. If a matching file exists, CAMB is not run.
+
+    Notes
+    -----
+    The CAMB result is memoised on the instance, keyed on the same fingerprint, so that
+    calling :meth:`lnt` several times (eg. when updating ``n``) does not re-run CAMB.
+
+    Only the settings of ``camb_params`` listed in :data:`CAMB_FINGERPRINT_FIELDS` are part
+    of the fingerprint. If other settings are changed, use a new instance and `cache_dir`.
     """
-    _defaults = {"camb_params": None}
+    _defaults = {"camb_params": None, "cache_dir": None}
 
     def __init__(self, *args, **kwargs):
         super(CAMB, self).__init__(*args, **kwargs)
@@ -164,6 +276,52 @@ class CAMB(FromFile):
                                                  standard_neutrino_neff=self.cosmo.Neff,
                                                  TCMB=self.cosmo.Tcmb0.value)
         self.params['camb_params'].WantTransfer = True
+        self._transfer_table = None
+
+    def _fingerprint(self):
+        """
+        A hash of the cosmology and CAMB parameters, which fully determine the transfer function.
+
+        The cosmology and the settings :data:`CAMB_FINGERPRINT_FIELDS` of ``camb_params`` are
+        hashed by content (see :func:`hmf._cache._hash_value`). Raises TypeError if any of them
+        is of a type whose content can't be hashed.
+        """
+        h = hashlib.sha1()
+        _hash_value(self.cosmo, h)
+        _hash_value(_camb_fields(self.params['camb_params']), h)
+        return h.hexdigest()
+
+    def _get_transfer_table(self):
+        """
+        The log transfer table, ``(lnk, lnT)``, either from memory, the cache directory, or CAMB.
+        """
+        try:
+            fp = self._fingerprint()
+        except TypeError as e:
+            warnings.warn("CAMB results are not being cached: %s" % e)
+            fp = None
+
+        if fp is not None and self._transfer_table is not None and self._transfer_table[0] == fp:
+            return self._transfer_table[1]
+
+        cache_dir = self.params['cache_dir']
+        fname = fp and cache_dir and os.path.join(cache_dir, "camb_%s.npy" % fp)
+
+        if fname and os.path.exists(fname):
+            T = np.load(fname)
+        else:
+            camb_transfers = camb.get_transfer_functions(self.params['camb_params'])
+            T = camb_transfers.get_matter_transfer_data().transfer_data
+            T = np.log(T[[0, 6], :, 0])
+
+            if fname:
+                # Write atomically, so that concurrent processes never see a partial file.
+                if not os.path.exists(cache_dir):
+                    os.makedirs(cache_dir)
+                atomic_write(fname, lambda f: np.save(f, T))
+
+        self._transfer_table = (fp, T)
+        return T
 
     def lnt(self, lnk):
         """
@@ -179,13 +337,10 @@ class CAMB(FromFile):
         lnt : array_like
             The log of the transfer function at lnk.
         """
-
-        camb_transfers = camb.get_transfer_functions(self.params['camb_params'])
-        T = camb_transfers.get_matter_transfer_data().transfer_data
-        T = np.log(T[[0, 6], :, 0])
+        T = self._get_transfer_table()
 
         if lnk[0] < T[0, 0]:
-            lnkout, lnT = self._check_low_k(T[0, :], T[1, :], lnk[0])
+            lnkout, lnT = self._check_low_k(T[0, :].copy(), T[1, :], lnk[0])
         else:
             lnkout = T[0, :]
             lnT = T[1, :]
@@ -384,15 +384,22 @@ class MassFunctionWDM(_MF, TransferWDM):
         """
         The number density of haloes in WDM, ``len=len(m)`` [units :math:`h^4 M_\odot^{-1} Mpc^{-3}`]
         """
-        dndm = super(MassFunctionWDM, self).dndm
-
-        if self.alter_dndm is not None:
-            if np.issubclass_(self.alter_dndm, WDMRecalibrateMF):
-                alter = self.alter_dndm(m=self.m, dndm0=dndm, wdm=self.wdm,
-                                        **self.alter_params)
-            else:
-                alter = get_model(self.alter_dndm, __name__, m=self.m,
-                                  dndm0=dndm, wdm=self.wdm, **self.alter_params)
-            dndm = alter.dndm_alter()
-
-        return dndm
+        return self._alter(self.m, super(MassFunctionWDM, self).dndm)
+
+    def _dndm_at(self, m):
+        return self._alter(m, super(MassFunctionWDM, self)._dndm_at(m))
+
+    def _alter(self, m, dndm):
+        """
+        Apply the empirical recalibration `alter_dndm` (if any) to `dndm` at masses `m`.
+        """
+        if self.alter_dndm is None:
+            return dndm
+
+        if np.issubclass_(self.alter_dndm, WDMRecalibrateMF):
+            alter = self.alter_dndm(m=m, dndm0=dndm, wdm=self.wdm,
+                                    **self.alter_params)
+        else:
+            alter = get_model(self.alter_dndm, __name__, m=m,
+                              dndm0=dndm, wdm=self.wdm, **self.alter_params)
+        return alter.dndm_alter()
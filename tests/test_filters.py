@@ -177,3 +177,90 @@ class TestGaussian(object):
 
         print(true, self.cls.dlnss_dlnr(R))
         assert np.isclose(self.cls.dlnss_dlnr(R),true)
+
+
+class TestTabulated(object):
+    def __init__(self):
+        k = np.logspace(-6,1,800)
+        pk = k**2 * np.exp(-k)
+        self.cls = filters.TopHat(k,pk)
+        self.tab = filters.TopHat(k,pk,tabulate=True)
+        self.r = np.logspace(-0.3,0.8,300)
+
+    def test_sigma(self):
+        assert np.allclose(self.tab.sigma(self.r), self.cls.sigma(self.r), rtol=1e-3)
+
+    def test_dlnssdlnr(self):
+        assert np.allclose(self.tab.dlnss_dlnr(self.r), self.cls.dlnss_dlnr(self.r), rtol=1e-3)
+
+    def test_extend(self):
+        r = np.logspace(0.8,1.2,10)
+        assert np.allclose(self.tab.sigma(r), self.cls.sigma(r), rtol=1e-3)
+
+    def test_invalidate(self):
+        self.tab.sigma(self.r)
+        self.tab.power = 2 * self.tab.power
+        assert np.allclose(self.tab.sigma(self.r), np.sqrt(2) * self.cls.sigma(self.r), rtol=1e-3)
+
+
+class TestChunked(object):
+    def __init__(self):
+        k = np.logspace(-6,1,800)
+        pk = k**2 * np.exp(-k)
+        self.cls = filters.TopHat(k,pk)
+        self.chunked = filters.TopHat(k,pk,chunk_size=7)
+        self.r = np.logspace(-0.3,0.8,50)
+
+    def test_sigma(self):
+        assert np.allclose(self.chunked.sigma(self.r), self.cls.sigma(self.r), rtol=1e-12)
+
+    def test_dlnssdlnr(self):
+        assert np.allclose(self.chunked.dlnss_dlnr(self.r), self.cls.dlnss_dlnr(self.r), rtol=1e-12)
+
+    def test_empty(self):
+        assert self.chunked.sigma(np.array([])).shape == (0,)
+        s, d = self.cls.sigma_and_derivative(np.array([]))
+        assert s.shape == d.shape == (0,)
+
+
+def test_sigma_and_derivative():
+    k = np.logspace(-6,1,800)
+    pk = k**2 * np.exp(-k)
+    r = np.logspace(-0.3,0.8,50)
+    for filt in [filters.TopHat, filters.Gaussian, filters.SharpK]:
+        cls = filt(k,pk)
+        s, d = cls.sigma_and_derivative(r)
+        assert np.allclose(s, cls.sigma(r), rtol=1e-12)
+        assert np.allclose(d, cls.dlnss_dlnr(r), rtol=1e-12)
+
+
+def _sharpk_reference(r):
+    # sigma for the SharpK filter and P(k) = k^2 exp(-k), by direct integration up to k=1/r
+    from scipy.integrate import quad
+    return np.sqrt([quad(lambda k: k ** 4 * np.exp(-k), 1e-6, 1 / rr)[0] / (2 * np.pi ** 2) for rr in r])
+
+
+def test_sharpk_quad():
+    k = np.logspace(-6,1,800)
+    pk = k**2 * np.exp(-k)
+    r = np.logspace(-0.3,0.8,20)
+    cls = filters.SharpK(k,pk)
+    sigma = _sharpk_reference(r)
+    assert np.allclose(cls.sigma(r), sigma, atol=0, rtol=1e-6)
+
+    dlnss = -(1 / r) ** 2 * np.exp(-1 / r) / (2 * np.pi ** 2 * sigma ** 2 * r ** 3)
+    assert np.allclose(cls.dlnss_dlnr(r), dlnss, atol=0, rtol=1e-6)
+
+
+def test_sharpk_ellipsoid_quad():
+    k = np.logspace(-6,1,800)
+    pk = k**2 * np.exp(-k)
+    r = np.logspace(-0.3,0.8,20)
+    cls = filters.SharpKEllipsoid(k,pk)
+    s, d = cls.sigma_and_derivative(r)
+    assert np.allclose(s, _sharpk_reference(r), atol=0, rtol=1e-6)
+
+    # The derivative is evaluated at the scale a3 of the ellipsoid
+    a3 = cls.a3(r)
+    dlnss = -(1 / a3) ** 2 * np.exp(-1 / a3) / (2 * np.pi ** 2 * _sharpk_reference(a3) ** 2 * a3 ** 3)
+    assert np.allclose(d, dlnss, atol=0, rtol=1e-6)
@@ -79,3 +79,22 @@ def test_tinker10_neg_beta():
     h = MassFunction(hmf_model="Tinker10", hmf_params={"beta_200":-1})
     h.fsigma
 
+
+
+def test_tinker_coefficients():
+    # The interpolated coefficients agree with a spline through the tabulated values
+    from scipy.interpolate import InterpolatedUnivariateSpline as spline
+    dv = ff.Tinker08.delta_virs
+    for dh in [250.0, 1000.0, 3000.0]:
+        fit = ff.Tinker08(nu2=np.ones(3), z=0, delta_halo=dh)
+        assert np.isclose(fit.c, spline(dv, [fit.params["c_%s" % d] for d in dv])(dh), rtol=1e-12)
+
+
+def test_tinker_array_dh():
+    nu2 = np.linspace(0.5, 5, 20)
+    dh = np.array([200.0, 250.0, 1600.0])[:, None]
+    z = np.array([0.0, 0.5, 1.0])[:, None]
+    for fit in [ff.Tinker08, ff.Tinker10]:
+        fsigma = fit(nu2=nu2, z=z, delta_halo=dh).fsigma
+        for i in range(3):
+            assert np.allclose(fsigma[i], fit(nu2=nu2, z=z[i, 0], delta_halo=dh[i, 0]).fsigma, atol=0, rtol=1e-12)
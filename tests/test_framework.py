@@ -1,11 +1,12 @@
 import inspect
+import numpy as np
 import os
 
 LOCATION = "/".join(os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe()))).split("/")[:-1])
 from nose.tools import raises
 import sys
 sys.path.insert(0, LOCATION)
-from hmf import hmf
+from hmf import hmf, transfer, _framework, _cache
 
 @raises(TypeError)
 def test_incorrect_argument():
@@ -43,4 +44,393 @@ class TestIntrospection(object):
 
     def test_parameter_info(self):
         assert self.cls.parameter_info() is None
-        assert self.cls.parameter_info(names=['z']) is None
\ No newline at end of file
+        assert self.cls.parameter_info(names=['z']) is None
+
+class TestDependencies(object):
+    def __init__(self):
+        self.inst = hmf.MassFunction(transfer_model="EH")
+        self.inst.dndm
+
+    def test_graph(self):
+        g = self.inst.dependency_graph()
+        assert "dndm" in g['sigma_8']
+        assert "sigma_8" in self.inst.dependency_graph(inverse=True)['dndm']
+        assert "dndm" not in g['takahashi']
+
+    def test_dot(self):
+        assert '"sigma_8" -> "dndm";' in self.inst.dependency_dot()
+
+    def test_plan(self):
+        plan = self.inst.plan_update(sigma_8=0.9)
+        assert "dndm" in plan and "transfer" not in plan
+        assert self.inst.plan_update(sigma_8=self.inst.sigma_8) == []
+
+        # Nothing is actually changed
+        assert self.inst.sigma_8 != 0.9
+
+    @raises(ValueError)
+    def test_plan_bad_arg(self):
+        self.inst.plan_update(wrong_arg=3)
+
+
+def test_profiling():
+    t = hmf.MassFunction(transfer_model="EH")
+    t.enable_profiling()
+    t.dndm
+    t.update(sigma_8=0.7)
+    t.dndm
+    t.dndm
+
+    report = t.profile_report()
+    assert report['dndm']['misses'] == 2
+    assert report['dndm']['hits'] >= 1
+    assert report['dndm']['triggers'] == {'sigma_8': 1}
+    assert report['transfer']['misses'] == 1
+    assert all(v['time'] >= 0 for v in report.values())
+
+    t.reset_profile()
+    assert t.profile_report() == {}
+
+
+@raises(ValueError)
+def test_profiling_disabled():
+    hmf.MassFunction().profile_report()
+
+
+class _Toy(_framework.Framework):
+    def __init__(self):
+        super(_Toy, self).__init__()
+        self.a = 1
+        self.b = 2
+        self.use_b = False
+        self.ncalls = 0
+
+    @_cache.parameter("param")
+    def a(self, val):
+        return val
+
+    @_cache.parameter("param")
+    def b(self, val):
+        return val
+
+    @_cache.parameter("switch")
+    def use_b(self, val):
+        return val
+
+    @_cache.cached_quantity
+    def q(self):
+        self.ncalls += 1
+        return self.a + (self.b if self.use_b else 0)
+
+    @_cache.cached_quantity
+    def q2(self):
+        return 2 * self.q
+
+
+class _ToySub(_Toy):
+    def __init__(self):
+        super(_ToySub, self).__init__()
+        self.c = 10
+
+    @_cache.parameter("param")
+    def c(self, val):
+        return val
+
+    @_cache.cached_quantity
+    def q(self):
+        return super(_ToySub, self).q * self.c
+
+
+def test_cache_switch_reindex():
+    t = _Toy()
+    assert t.q2 == 2 and t.ncalls == 1
+    assert t.q2 == 2 and t.ncalls == 1
+
+    # b is not (yet) a dependency
+    t.b = 3
+    assert t.q2 == 2 and t.ncalls == 1
+
+    t.a = 2
+    assert t.q2 == 4 and t.ncalls == 2
+
+    # After switching, b becomes a dependency of both quantities.
+    t.use_b = True
+    assert t.q2 == 10 and t.ncalls == 3
+    t.b = 1
+    assert t.q2 == 6
+    assert t.dependency_graph(inverse=True)['q2'] == ['a', 'b', 'use_b']
+
+
+def test_fingerprint():
+    t1, t2 = _Toy(), _Toy()
+    assert t1.fingerprint() == t2.fingerprint()
+
+    t2.b = 5
+    assert t1.fingerprint() != t2.fingerprint()
+    assert t1.fingerprint("q") == t2.fingerprint("q")
+    t2.use_b = True
+    assert t1.fingerprint("q") != t2.fingerprint("q")
+
+
+def test_array_param_hash():
+    t = _Toy()
+    t.a = np.arange(3.0)
+    assert np.all(t.q == [0, 1, 2]) and t.ncalls == 1
+
+    # Equal arrays don't trigger a re-calculation
+    fp = t.fingerprint()
+    t.a = np.arange(3.0)
+    assert np.all(t.q == [0, 1, 2]) and t.ncalls == 1
+    assert t.fingerprint() == fp
+
+    t.a = np.arange(1.0, 4.0)
+    assert np.all(t.q == [1, 2, 3]) and t.ncalls == 2
+    assert t.fingerprint() != fp
+
+
+
+def test_array_param_hash_lazy():
+    # Setting an array doesn't hash it; the hash is calculated for fingerprints.
+    t = _Toy()
+    t.a = np.arange(3.0)
+    t.a = np.arange(1.0, 4.0)
+    assert "a" not in t._cache_state.hashes
+    fp = t.fingerprint()
+    assert "a" in t._cache_state.hashes
+
+    t.a = np.arange(1.0, 4.0)
+    assert "a" in t._cache_state.hashes and t.fingerprint() == fp
+    t.a = np.arange(1, 4)  # Same values, different dtype
+    assert "a" not in t._cache_state.hashes and t.fingerprint() != fp
+
+
+def test_fingerprint_cosmology():
+    from astropy.cosmology import Planck15
+    t1, t2 = _Toy(), _Toy()
+    t1.a = Planck15.clone(name="c", m_nu=[0, 0, 0.06])
+    t2.a = Planck15.clone(name="c", m_nu=[0, 0, 0.06])
+    assert t1.fingerprint() == t2.fingerprint()
+
+    # A difference far below the precision of the cosmology's repr
+    t2.a = Planck15.clone(name="c", m_nu=[0, 0, 0.06 + 1e-10])
+    assert t1.fingerprint() != t2.fingerprint()
+
+
+def test_fingerprint_default_mass_function():
+    # The default cosmology is hashable by content whatever the version of astropy.
+    mf1 = hmf.MassFunction(transfer_model="EH")
+    mf2 = hmf.MassFunction(transfer_model="EH")
+    assert mf1.fingerprint() == mf2.fingerprint()
+
+    mf2.update(cosmo_params={"Om0": 0.31})
+    assert mf1.fingerprint() != mf2.fingerprint()
+
+
+@raises(TypeError)
+def test_fingerprint_unknown():
+    class Obj(object):
+        def __repr__(self):
+            return "Obj()"
+
+    t = _Toy()
+    t.a = Obj()
+    t.fingerprint()
+
+def test_fork():
+    mf = hmf.MassFunction(transfer_model="EH")
+    mf.enable_profiling()
+    dndm = mf.dndm.copy()
+
+    child = mf.fork(hmf_model="PS", cosmo_params={"Om0": 0.3})
+    assert np.shares_memory(child.m, mf.m)
+    assert not child.m.flags.writeable
+
+    ref = hmf.MassFunction(transfer_model="EH", hmf_model="PS", cosmo_params={"Om0": 0.3})
+    assert np.allclose(child.dndm, ref.dndm, atol=0, rtol=1e-12)
+
+    # The parent is unaffected
+    assert mf.cosmo_params == {}
+    assert np.all(mf.dndm == dndm)
+
+    # Only quantities invalidated by the updates were re-calculated
+    child = mf.fork(hmf_model="PS")
+    child.dndm
+    assert "_unn_sigma_and_derivative" not in child.profile_report()
+
+
+def test_disk_cache():
+    import tempfile
+    import shutil
+    direc = tempfile.mkdtemp()
+    try:
+        t = _Toy()
+        t.enable_disk_cache(direc, ["q"])
+        assert t.q2 == 2 and t.ncalls == 1
+
+        # A new instance loads the stored value.
+        t = _Toy()
+        t.enable_disk_cache(direc, ["q"])
+        assert t.q2 == 2 and t.ncalls == 0
+        t.a = 5
+        assert t.q2 == 10 and t.ncalls == 1
+        t.a = 1
+        assert t.q2 == 2 and t.ncalls == 1
+
+        # Each set of dependencies is stored separately, and restored into the index.
+        t.use_b = True
+        assert t.q2 == 6 and t.ncalls == 2
+        t = _Toy()
+        t.enable_disk_cache(direc, ["q"])
+        t.use_b = True
+        assert t.q2 == 6 and t.ncalls == 0
+        t.b = 5
+        assert t.q2 == 12 and t.ncalls == 1
+    finally:
+        shutil.rmtree(direc)
+
+
+def test_disk_cache_override():
+    # An overridden quantity is stored separately from the one it overrides, and values
+    # are not shared between classes.
+    import tempfile
+    import shutil
+    direc = tempfile.mkdtemp()
+    try:
+        for i in range(2):
+            t = _ToySub()
+            t.enable_disk_cache(direc, ["q"])
+            assert t.q == 10 and t.ncalls == 1 - i
+
+        for i in range(2):
+            t = _Toy()
+            t.enable_disk_cache(direc, ["q"])
+            assert t.q == 1 and t.ncalls == 1 - i
+    finally:
+        shutil.rmtree(direc)
+
+
+def test_disk_cache_eviction():
+    import tempfile
+    import shutil
+    direc = tempfile.mkdtemp()
+    try:
+        t = transfer.Transfer(transfer_model="EH")
+        t.enable_disk_cache(direc, ["_unnormalised_lnT"], max_size=1.5 * t.k.nbytes)
+        for n in [0.9, 1.0]:
+            t.update(cosmo_params={"Om0": n * 0.3})
+            t.power
+
+        files = [f for root, dirs, fnames in os.walk(direc) for f in fnames if f.endswith(".npy")]
+        assert len(files) == 1
+
+        ref = transfer.Transfer(transfer_model="EH", cosmo_params={"Om0": 0.3})
+        t.update(cosmo_params={"Om0": 0.3})
+        assert np.all(t.power == ref.power)
+    finally:
+        shutil.rmtree(direc)
+
+
+def test_disk_cache_cosmology():
+    # Quantities depending on the cosmology are stored.
+    import tempfile
+    import shutil
+    direc = tempfile.mkdtemp()
+    try:
+        mf = hmf.MassFunction(transfer_model="EH")
+        mf.enable_disk_cache(direc, ["_unnormalised_lnT", "_unn_sig8"])
+        mf.dndm
+
+        files = [f for root, dirs, fnames in os.walk(direc) for f in fnames if f.endswith(".npy")]
+        assert len(files) == 2
+    finally:
+        shutil.rmtree(direc)
+
+
+def test_disk_cache_unhashable_warns():
+    import tempfile
+    import shutil
+    import warnings
+
+    class Obj(object):
+        def __radd__(self, other):
+            return other
+
+    direc = tempfile.mkdtemp()
+    try:
+        t = _Toy()
+        t.a = 1
+        t.b = Obj()
+        t.use_b = True
+        t.enable_disk_cache(direc, ["q"])
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            assert t.q == 1
+        assert len(w) == 1 and "disk cache" in str(w[0].message)
+    finally:
+        shutil.rmtree(direc)
+
+
+def test_locking_threads():
+    import threading
+    t = hmf.MassFunction(transfer_model="EH")
+    t.enable_locking()
+    ref = dict((z, hmf.MassFunction(transfer_model="EH", z=z).dndm) for z in [0.0, 1.0])
+    errors = []
+
+    def work(z):
+        for i in range(3):
+            with t.lock:
+                t.update(z=z)
+                if not np.allclose(t.dndm, ref[z], atol=0, rtol=1e-8):
+                    errors.append(z)
+
+    threads = [threading.Thread(target=work, args=(z,)) for z in ref]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    assert not errors
+
+
+def test_pickle_other_process():
+    # The dependency index must survive a process in which bits were assigned differently.
+    import pickle
+    import subprocess
+    import tempfile
+    t = _Toy()
+    t.q2
+    fd, fname = tempfile.mkstemp(suffix=".pkl")
+    try:
+        with os.fdopen(fd, "wb") as fl:
+            pickle.dump(t, fl)
+
+        script = "\n".join([
+            "import sys, pickle",
+            "sys.path[:0] = [%r, %r]" % (LOCATION, os.path.join(LOCATION, "tests")),
+            "from hmf import _cache",
+            "for i in range(100): _cache.bit_of('_other_%d' % i)",
+            "t = pickle.load(open(%r, 'rb'))" % fname,
+            "assert t.dependency_graph(inverse=True)['q2'] == ['a', 'use_b'], t.dependency_graph(inverse=True)",
+            "t.a = 3",
+            "assert t.q2 == 6 and t.ncalls == 2",
+        ])
+        subprocess.check_call([sys.executable, "-c", script])
+    finally:
+        os.remove(fname)
+
+
+def test_snapshot():
+    t = hmf.MassFunction(transfer_model="EH")
+    s = t.snapshot("dndm")
+    dndm = t.dndm.copy()
+    t.update(z=1.0)
+
+    assert s.z == 0
+    assert np.all(s.dndm == dndm)
+    assert not s.dndm.flags.writeable
+
+
+@raises(AttributeError)
+def test_snapshot_immutable():
+    s = hmf.MassFunction(transfer_model="EH").snapshot()
+    s.z = 2.0
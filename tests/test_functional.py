@@ -2,7 +2,7 @@ import numpy as np
 import inspect
 import os
 LOCATION = "/".join(os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe()))).split("/")[:-1])
-# from nose.tools import raises
+from nose.tools import raises
 import sys
 sys.path.insert(0, LOCATION)
 from hmf import functional as tf
@@ -29,3 +29,89 @@ def test_order():
         assert isinstance(mf,MassFunction)
         assert np.allclose(quants[0],mf.dndm)
         assert np.allclose(quants[1],mf.ngtm)
+
+
+def test_parallel():
+    kwargs = dict(z=list(range(3)), hmf_model=["ST", "PS"], sigma_8=[0.7, 0.8], transfer_model="EH")
+    serial = [(quants[0].copy(), label) for quants, mf, label in tf.get_hmf('dndm', **kwargs)]
+
+    for i, (quants, snapshot, label) in enumerate(tf.get_hmf('dndm', n_workers=2, **kwargs)):
+        assert label == serial[i][1]
+        assert np.allclose(quants[0], serial[i][0], atol=0, rtol=1e-10)
+        assert np.all(snapshot.dndm == quants[0])
+
+
+def test_records():
+    import pickle
+    kwargs = dict(z=[0, 1], sigma_8=[0.7, 0.8], transfer_model="EH")
+    serial = [(quants[1].copy(), label) for quants, mf, label in tf.get_hmf(['dndm', 'ngtm'], **kwargs)]
+    records = list(tf.get_hmf(['dndm', 'ngtm'], records=True, **kwargs))
+
+    for rec, (ngtm, label) in zip(records, serial):
+        assert rec.label == label
+        assert np.all(rec.ngtm == ngtm)
+        assert not rec.ngtm.flags.writeable
+
+    assert records[-1].params == {"z": 1, "sigma_8": 0.8}
+    rec = pickle.loads(pickle.dumps(records[0]))
+    assert np.all(rec.dndm == records[0].dndm)
+    assert rec.label == records[0].label
+    assert rec.params == records[0].params
+
+
+@raises(AttributeError)
+def test_records_immutable():
+    rec = next(tf.get_hmf('dndm', records=True, z=[0, 1], transfer_model="EH"))
+    rec.label = "other"
+
+
+@raises(TypeError)
+def test_records_params_immutable():
+    rec = next(tf.get_hmf('dndm', records=True, z=[0, 1], transfer_model="EH"))
+    rec.params["z"] = 5
+
+
+def test_output_dir():
+    import tempfile
+    import shutil
+    direc = tempfile.mkdtemp()
+    try:
+        kwargs = dict(z=[0, 1], hmf_model=["ST", "PS"], transfer_model="EH")
+        sweep = tf.get_hmf(['dndm', 'mean_density'], output_dir=direc, **kwargs)
+        serial = [quants[0].copy() for quants, mf, label in sweep]
+
+        params, done, columns = tf.read_sweep(direc)
+        assert np.all(done)
+        assert columns['dndm'].shape == (4, len(serial[0]))
+        assert columns['mean_density'].shape == (4,)
+        assert list(params['hmf_model']) == ["ST", "ST", "PS", "PS"]
+        assert np.all(params['z'] == [0, 1, 0, 1])
+        for i, dndm in enumerate(serial):
+            assert np.all(columns['dndm'][i] == dndm)
+    finally:
+        shutil.rmtree(direc)
+
+
+@raises(ValueError)
+def test_output_dir_shape_change():
+    import tempfile
+    import shutil
+    direc = tempfile.mkdtemp()
+    try:
+        for _ in tf.get_hmf('dndm', output_dir=direc, Mmax=[14, 15], transfer_model="EH"):
+            pass
+    finally:
+        shutil.rmtree(direc)
+
+
+@raises(ValueError)
+def test_output_dir_not_empty():
+    import tempfile
+    import shutil
+    direc = tempfile.mkdtemp()
+    try:
+        for _ in tf.get_hmf('dndm', output_dir=direc, z=[0, 1], transfer_model="EH"):
+            pass
+        next(tf.get_hmf('ngtm', output_dir=direc, z=[0, 1], transfer_model="EH"))
+    finally:
+        shutil.rmtree(direc)
@@ -47,4 +47,20 @@ class TestSimilarity(object):
 
         gf = np.linspace(0.15,0.99,10)
         print(gf_func(gf),genf_func(gf))
-        assert np.allclose(gf_func(gf),genf_func(gf),rtol=1e-1)
\ No newline at end of file
+        assert np.allclose(gf_func(gf),genf_func(gf),rtol=1e-1)
+
+def test_growth_cosmo_change():
+    from hmf.cosmo import Planck15
+    g = gf.GrowthFactor(Planck13)
+    g13 = g.growth_factor(2.0)
+    g.cosmo = Planck15
+    assert np.isclose(g.growth_factor(2.0), gf.GrowthFactor(Planck15).growth_factor(2.0), rtol=1e-10)
+    assert not np.isclose(g.growth_factor(2.0), g13, rtol=1e-5)
+
+
+def test_array_z():
+    z = np.linspace(0, 8, 17)
+    for cls in [gf.GrowthFactor, gf.GenMFGrowth, gf.Carroll1992]:
+        g = cls(Planck13)
+        assert np.allclose(g.growth_factor(z), [g.growth_factor(zz) for zz in z], rtol=1e-5)
+        assert np.ndim(g.growth_factor(1.0)) == 0
@@ -42,3 +42,26 @@ def test_halofit_high_s8():
     print(t.nonlinear_power[0]/thi.nonlinear_power[0] -1, t.nonlinear_power[-1]/thi.nonlinear_power[-1] -1)
     assert np.isclose(t.nonlinear_power[0],thi.nonlinear_power[0],rtol=2e-2)
     assert np.isclose(t.nonlinear_power[-1], thi.nonlinear_power[-1], rtol=5e-2)
+
+
+def test_halofit_array_z():
+    z = np.array([0.0, 1.0, 3.0])
+    t = transfer.Transfer(transfer_model="EH", lnk_max=7, z=z)
+    assert t.nonlinear_power.shape == (3, len(t.k))
+
+    for i, zz in enumerate(z):
+        t1 = transfer.Transfer(transfer_model="EH", lnk_max=7, z=zz)
+        assert np.allclose(t.nonlinear_power[i], t1.nonlinear_power, rtol=1e-5)
+
+
+def test_get_spec_not_proportional():
+    # Rows which are not a rescaling of one spectrum are treated separately.
+    from hmf.halofit import _get_spec
+    t = transfer.Transfer(transfer_model="EH", lnk_max=7)
+    delta_k = t.k ** 3 * t.power / (2 * np.pi ** 2)
+    rows = np.array([delta_k, 0.5 * delta_k * (1 + 0.5 * np.tanh(np.log(t.k)))])
+
+    rknl, rneff, rncur = _get_spec(t.k, rows, t.sigma_8)
+    for i, row in enumerate(rows):
+        ref = _get_spec(t.k, row, t.sigma_8)
+        assert np.allclose([rknl[i], rneff[i], rncur[i]], np.concatenate(ref), rtol=1e-10)
@@ -99,7 +99,103 @@ def test_mass_nonlinear_outside_range():
         assert len(w)
 
 
+def test_array_z():
+    zs = [0.0, 0.5, 2.0]
+    h = MassFunction(z=zs, transfer_model="EH")
+    assert h.dndm.shape == (len(zs), len(h.m))
 
+    for i, z in enumerate(zs):
+        h_ = MassFunction(z=z, transfer_model="EH")
+        assert np.allclose(h.sigma[i], h_.sigma, atol=0, rtol=1e-10)
+        assert np.allclose(h.dndm[i], h_.dndm, atol=0, rtol=1e-10)
+        assert np.allclose(h.ngtm[i], h_.ngtm, atol=0, rtol=1e-10)
 
 
+def test_array_z_update():
+    h = MassFunction(transfer_model="EH")
+    h.update(z=[0.0])
+    assert h.dndm.shape == (1, len(h.m))
+    h.update(z=0.0)
+    assert h.dndm.shape == (len(h.m),)
 
+
+@raises(ValueError)
+def test_neg_array_z():
+    h = MassFunction(z=[0, -1])
+
+
+def test_evaluate_grid():
+    h = MassFunction(transfer_model="EH", hmf_model="ST")
+    table = {"sigma_8": [0.7, 0.8, 0.9], "n": [0.95, 0.97, 1.0],
+             "z": [0.0, 1.0, 0.5], "Om0": [0.3, 0.3, 0.32]}
+    out = h.evaluate_grid(table, quantities=["dndm", "sigma"])
+    assert out['dndm'].shape == (3, len(h.m))
+
+    for i in range(3):
+        h_ = MassFunction(transfer_model="EH", hmf_model="ST", sigma_8=table['sigma_8'][i],
+                          n=table['n'][i], z=table['z'][i], cosmo_params={"Om0": table['Om0'][i]})
+        assert np.allclose(out['sigma'][i], h_.sigma, atol=0, rtol=1e-5)
+        assert np.allclose(out['dndm'][i], h_.dndm, atol=0, rtol=1e-5)
+
+    # The original instance is left untouched
+    assert h.parameter_values['cosmo_params'] == {}
+
+
+def test_evaluate_grid_cosmo_params():
+    h = MassFunction(transfer_model="EH", cosmo_params={"Om0": 0.3})
+    out = h.evaluate_grid({"H0": [60.0, 75.0]})
+
+    assert h.cosmo_params == {"Om0": 0.3}
+    h_ = MassFunction(transfer_model="EH", cosmo_params={"Om0": 0.3, "H0": 75.0})
+    assert np.allclose(out['dndm'][1], h_.dndm, atol=0, rtol=1e-6)
+
+
+def test_evaluate_grid_shared_n():
+    # Rows sharing a cosmology and spectral index share one mass-variance integral.
+    h = MassFunction(transfer_model="EH", hmf_model="ST")
+    table = {"sigma_8": [0.7, 0.8, 0.9, 0.8], "n": [0.97, 0.97, 1.0, 0.97],
+             "z": [0.0, 1.0, 0.5, 2.0]}
+    out = h.evaluate_grid(table, quantities=["dndm", "n_eff"], chunk_size=2)
+
+    for i in range(4):
+        h.update(sigma_8=table['sigma_8'][i], n=table['n'][i], z=table['z'][i])
+        assert np.allclose(out['dndm'][i], h.dndm, atol=0, rtol=1e-10)
+        assert np.allclose(out['n_eff'][i], h.n_eff, atol=0, rtol=1e-10)
+
+
+@raises(ValueError)
+def test_evaluate_grid_bad_quantity():
+    h = MassFunction(transfer_model="EH")
+    h.evaluate_grid({"sigma_8": [0.8]}, quantities=["ngtm"])
+
+
+def test_evaluate_models():
+    h = MassFunction(transfer_model="EH", hmf_model="ST")
+    dndm = h.dndm
+    models = ["PS", "SMT", "Tinker08", "Behroozi"]
+    out = h.evaluate_models(models, quantities=["fsigma", "dndm"],
+                            model_params={"Tinker08": {"A_200": 0.2}})
+
+    for model in models:
+        h_ = MassFunction(transfer_model="EH", hmf_model=model,
+                          hmf_params={"A_200": 0.2} if model == "Tinker08" else {})
+        assert np.allclose(out[model]['fsigma'], h_.fsigma, atol=0, rtol=1e-10)
+        assert np.allclose(out[model]['dndm'], h_.dndm, atol=0, rtol=1e-10)
+
+    # The instance is left untouched
+    assert h.dndm is dndm
+
+
+@raises(ValueError)
+def test_evaluate_models_bad_quantity():
+    h = MassFunction(transfer_model="EH")
+    h.evaluate_models(["PS"], quantities=["ngtm"])
+
+
+def test_ngtm_extension():
+    # ngtm with a low Mmax relies on extending dndm beyond Mmax internally,
+    # which should agree with simply using a larger mass range.
+    h = MassFunction(transfer_model="EH", Mmin=10, Mmax=14)
+    h_ = MassFunction(transfer_model="EH", Mmin=10, Mmax=18)
+    n = len(h.m)
+    assert np.allclose(h.ngtm, h_.ngtm[:n], atol=0, rtol=1e-3)
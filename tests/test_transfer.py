@@ -60,3 +60,83 @@ def test_bondefs():
 #     diff = t.power - pdata[:, 1]
 #     #print(t._unnormalised_lnT[400], t._unnormalised_power[400], t._power0[400])
 #     assert rms(t.power - pdata[:, 1]) < 0.001
+
+def test_fromfile_sidecar():
+    import shutil, tempfile
+    from hmf import transfer_models
+    d = tempfile.mkdtemp()
+    fname = os.path.join(d, "transfer.dat")
+    shutil.copy(LOCATION + "/data/transfer_for_hmf_tests.dat", fname)
+
+    t = Transfer(transfer_model="FromFile", transfer_params={"fname": fname})
+    lnT = t._unnormalised_lnT.copy()
+
+    # Second read comes from the cache
+    assert len([k for k in transfer_models._table_cache if k[0] == fname]) == 1
+
+    np.save(fname + ".npy", np.genfromtxt(fname))
+    transfer_models._table_cache.clear()
+    t2 = Transfer(transfer_model="FromFile", transfer_params={"fname": fname})
+    assert np.allclose(t2._unnormalised_lnT, lnT)
+    shutil.rmtree(d)
+
+
+def test_fromfile_extended():
+    # The spline extended to low k (with the default lnk_min) is cached with the table.
+    import shutil, tempfile
+    d = tempfile.mkdtemp()
+    fname = os.path.join(d, "transfer.dat")
+    data = np.genfromtxt(LOCATION + "/data/transfer_for_hmf_tests.dat")
+    np.savetxt(fname, data[data[:, 0] > 1e-4])
+
+    t = Transfer(transfer_model="FromFile", transfer_params={"fname": fname})
+    lnT = t._unnormalised_lnT.copy()
+
+    T, fnc, extended = t.transfer._load_table(fname)
+    assert np.log(t.k[0]) < T[0, 0] and len(extended) == 1
+    fnc = list(extended.values())[0]
+
+    assert np.all(t.transfer.lnt(np.log(t.k)) == lnT)
+    assert len(extended) == 1 and list(extended.values())[0] is fnc
+    shutil.rmtree(d)
+
+
+def test_camb_cache():
+    from unittest import SkipTest
+    try:
+        import camb
+    except ImportError:
+        raise SkipTest("camb is not installed")
+    import shutil, tempfile
+    from astropy.cosmology import Planck15
+    from hmf import transfer_models
+
+    runs = []
+    get_transfer_functions = camb.get_transfer_functions
+
+    def counted(params):
+        runs.append(1)
+        return get_transfer_functions(params)
+
+    camb.get_transfer_functions = counted
+    d = tempfile.mkdtemp()
+    try:
+        lnk = np.linspace(-10, 4, 50)
+        t = transfer_models.CAMB(Planck15, cache_dir=d)
+        lnt = t.lnt(lnk)
+        t.lnt(lnk)
+        assert len(runs) == 1
+
+        # Another instance with the same parameters reads cache_dir
+        t = transfer_models.CAMB(Planck15, cache_dir=d)
+        assert np.all(t.lnt(lnk) == lnt)
+        assert len(runs) == 1
+
+        # A change to a sub-model in place is a miss, both in memory and in cache_dir
+        t.params['camb_params'].DarkEnergy.w = -0.9
+        t.lnt(lnk)
+        assert len(runs) == 2
+        assert len(os.listdir(d)) == 2
+    finally:
+        shutil.rmtree(d)
+        camb.get_transfer_functions = get_transfer_functions
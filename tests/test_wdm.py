@@ -94,4 +94,61 @@ class TestMassFunction(object):
 class TestMassFunctionAlter(TestMassFunction):
     def __init__(self):
         self.wdm = wdm.MassFunctionWDM(alter_dndm=wdm.Schneider12_vCDM, wdm_mass=3.0, wdm_model=wdm.Viel05)
-        self.cdm = hmf.MassFunction()
\ No newline at end of file
+        self.cdm = hmf.MassFunction()
+
+
+def test_unn_sig8():
+    # sigma_8 is normalised with the WDM power spectrum
+    from hmf.filters import TopHat
+    h = wdm.MassFunctionWDM(wdm_mass=0.1, transfer_model="EH", lnk_min=-18, lnk_max=9.9)
+    assert isinstance(h._unn_sig8, float)
+    assert np.isclose(h._unn_sig8, TopHat(h.k, h._unnormalised_power).sigma(8.0)[0], atol=0, rtol=1e-10)
+
+
+@raises(ValueError)
+def test_evaluate_grid():
+    h = wdm.MassFunctionWDM(wdm_mass=0.1, transfer_model="EH")
+    h.evaluate_grid({"sigma_8": [0.8]})
+
+
+def test_disk_cache_alter():
+    # The recalibrated dndm is not confused with the CDM dndm it is calculated from.
+    import tempfile
+    import shutil
+    direc = tempfile.mkdtemp()
+    try:
+        kwargs = dict(transfer_model="EH", wdm_mass=0.5, alter_dndm=wdm.Schneider12)
+        ref = wdm.MassFunctionWDM(**kwargs).dndm
+        for i in range(2):
+            h = wdm.MassFunctionWDM(**kwargs)
+            h.enable_disk_cache(direc, ["dndm"])
+            assert np.allclose(h.dndm, ref, atol=0, rtol=1e-12)
+    finally:
+        shutil.rmtree(direc)
+
+
+def test_evaluate_models_alter():
+    # The recalibration is applied to the dndm of each model.
+    h = wdm.MassFunctionWDM(wdm_mass=0.5, transfer_model="EH", alter_dndm=wdm.Schneider12_vCDM)
+    out = h.evaluate_models(["ST", "Tinker08"], quantities=["dndm"])
+    assert np.allclose(out["Tinker08"]["dndm"], h.dndm, atol=0, rtol=1e-10)
+
+    h.update(hmf_model="ST")
+    assert np.allclose(out["ST"]["dndm"], h.dndm, atol=0, rtol=1e-10)
+
+
+def test_disk_cache_subclass():
+    # A subclass overriding an upstream quantity doesn't read its parent's stored values.
+    import tempfile
+    import shutil
+    direc = tempfile.mkdtemp()
+    try:
+        cdm = hmf.MassFunction(transfer_model="EH")
+        cdm.enable_disk_cache(direc, ["sigma"])
+        cdm.sigma
+        h = wdm.MassFunctionWDM(wdm_mass=0.1, transfer_model="EH")
+        h.enable_disk_cache(direc, ["sigma"])
+        assert not np.allclose(h.sigma, cdm.sigma)
+        assert np.allclose(h.sigma, wdm.MassFunctionWDM(wdm_mass=0.1, transfer_model="EH").sigma, atol=0, rtol=1e-12)
+    finally:
+        shutil.rmtree(direc)